@@ -1,32 +1,28 @@
 import streamlit as st
 import random
-import whois
-import json
-import datetime
-import os
-from typing import List, Tuple
+import time
+from typing import List
 import pandas as pd
 
+import domain_checker
+from domain_checker import (DEFAULT_MAX_WORKERS, DEFAULT_SERVER_RATE, WHOIS_BACKENDS,
+                            MetricsRecorder, domain_extensions, extensions_sorted_by_price,
+                            extensions_under_price, load_words_from_json,
+                            results_store_filename)
+from jobs import (JOB_CANCELLED, JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, CheckJob,
+                  get_job_manager)
+
 # --- توابع مربوط به بارگذاری و ذخیره لیست کلمات ---
 
 
 def save_words_to_json(word_list: List[str], filename: str):
     try:
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(word_list, f, indent=4, ensure_ascii=False)
+        domain_checker.save_words_to_json(word_list, filename)
         st.sidebar.success(
             f"Successfully saved {len(word_list)} words to {filename}.")
     except Exception as e:
         st.sidebar.error(f"Error saving to {filename}: {str(e)}")
 
-
-def load_words_from_json(filename: str) -> List[str]:
-    try:
-        with open(filename, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
-
 # تابع برای بارگذاری لیست‌های کلمات منتخب
 
 
@@ -37,150 +33,257 @@ def load_curated_list(filename: str) -> List[str]:
     return words
 
 
-# --- دیکشنری پسوندها و قیمت‌ها ---
-domain_extensions_data = {
-    1: (".nl", "6897290"), 2: (".info", "4927230"), 3: (".xyz", "3605402"),
-    4: (".in", "13264020"), 5: (".at", "12130549"), 6: (".online", "3557169"),
-    7: (".me", "10699054"), 8: (".vip", "16929713"), 9: (".live", "4039497"),
-    10: (".trade", "6692301"), 11: (".cc", "9960073"), 12: (".ir", "450000"),
-    13: (".mobi", "7114338"), 14: (".express", "13505184"), 15: (".io", "46725525"),
-    16: (".icu", "4482844"), 17: (".work", "10418285"), 18: (".zone", "13505184"),
-    19: (".site", "2351349"), 20: (".life", "3014550"), 21: (".space", "2351349"),
-    22: (".club", "16929713"), 23: (".ltd", "8983359"), 24: (".link", "9067766"),
-    25: (".works", "9887724"), 26: (".pro", "4721929"), 27: (".asia", "14325142"),
-    28: (".app", "19244887"), 29: (".rocks", "5064444"), 30: (".tech", "4762989"),
-    31: (".plus", "13505184"), 32: (".cloud", "18666094"), 33: (".biz", "20836570"),
-    34: (".dev", "16495618"), 35: (".observer", "11394999"),
-    37: (".direct", "18027009"), 38: (".store", "3557169"), 39: (".solutions", "9887724"),
-    40: (".shop", "2399582"), 47: (".website", "2351349"), 48: (".today", "4039497"),
-    49: (".name", "8296042"), 50: (".guru", "4039497"), 51: (".show", "16218279"),
-    52: (".london", "36488113"), 53: (".design", "50933837"), 55: (".center", "10792089"),
-    56: (".news", "13505184"), 57: (".tel", "11202068"), 58: (".win", "6692301"),
-    59: (".email", "6089391"), 60: (".company", "8139285"), 61: (".systems", "24357564"),
-    62: (".li", "8513089"), 63: (".host", "97671420"), 64: (".one", "17303517"),
-    65: (".loan", "6692301"), 66: (".business", "4039497"), 67: (".world", "3014550"),
-    68: (".click", "2399582"), 70: (".ink", "26045712"), 71: (".market", "40768774"),
-    72: (".tv", "31110156"), 73: (".bid", "6692301"), 74: (".stream", "6692301"),
-    76: (".men", "6692301"), 77: (".pw", "7174629"), 78: (".photography", "13505184"),
-    79: (".exchange", "13505184"), 81: (".ph", "54985392"), 82: (".buzz", "33642378"),
-    83: (".international", "13505184"), 84: (".media", "8139285"),
-    86: (".berlin", "55720942"), 87: (".jobs", "198960300"), 90: (".group", "9887724"),
-    91: (".global", "36114309"), 92: (".art", "3574321"), 93: (".blog", "4762989"),
-    94: (".studio", "19835739"), 95: (".ooo", "27480638"), 97: (".digital", "3014550"),
-    98: (".services", "10792089"), 99: (".expert", "10792089"), 100: (".tools", "16218279"),
-    101: (".agency", "8139285"),
-    102: (".network", "8139285")
-}
-temp_extensions = {}
-seen_tlds = set()
-for key, (tld, price_val) in domain_extensions_data.items():
-    if tld not in seen_tlds:
-        temp_extensions[key] = (tld, price_val)
-        seen_tlds.add(tld)
-domain_extensions = temp_extensions
-
-
 # --- توابع کاربردی ---
-def price_to_number(price: str) -> float:
-    price_clean = price.replace(",", "").strip()
-    try:
-        return float(price_clean)
-    except ValueError:
-        return float('inf')
+def build_availability_matrix(results_df: pd.DataFrame) -> pd.DataFrame:
+    """Pivot per-domain results into one row per word and one column per TLD."""
+    tld_order = list(dict.fromkeys(results_df["پسوند"]))
+    matrix = results_df.pivot_table(index="کلمه", columns="پسوند", values="وضعیت",
+                                    aggfunc="first", sort=False, observed=True)
+    return matrix.reindex(columns=tld_order)
 
 
-def generate_random_words(count: int, length: int) -> List[str]:
-    letters = "abcdefghijklmnopqrstuvwxyz"
-    words = set()
+def generate_random_words(count: int, length: int,
+                          pronounceable: bool = False) -> List[str]:
     if count == 0:
         return []
     progress_bar = st.sidebar.progress(0)
     status_text = st.sidebar.empty()
-    for i in range(count * 2):
-        word = ''.join(random.choice(letters) for _ in range(length))
-        words.add(word)
-        progress = min((i + 1) / (count * 1.5), 1.0)
-        progress_bar.progress(progress)
-        status_text.text(
-            f"تولید کلمه تصادفی {length} حرفی: {len(words)}/{count}")
-        if len(words) >= count:
-            break
+
+    def on_progress(found: int, total: int):
+        progress_bar.progress(min(found / total, 1.0))
+        status_text.text(f"تولید کلمه تصادفی {length} حرفی: {found}/{total}")
+
+    # کلماتی که قبلاً در کش یا فایل نتایج بررسی شده‌اند دوباره تولید نمی‌شوند
+    exclude = domain_checker.known_words(
+        [results_store_filename("random")])
+    pattern = domain_checker.alternating_pattern(
+        length) if pronounceable else None
+    words = domain_checker.generate_random_words(
+        count, length, on_progress, exclude, pattern)
     progress_bar.empty()
     status_text.empty()
-    return list(words)[:count]
+    if len(words) < count:
+        st.sidebar.warning(
+            f"فقط {len(words)} کلمه {length} حرفی جدید با این شرایط وجود داشت.")
+    return words
 
 
-def check_domain_availability(domain: str) -> str:
-    try:
-        w = whois.whois(domain)
-        if w is None or not hasattr(w, 'status'):
-            return "Available"
-        if w.status is None or \
-           (isinstance(w.status, list) and any("available" in str(s).lower() for s in w.status)) or \
-           (isinstance(w.status, str) and "available" in w.status.lower()) or \
-           (hasattr(w, 'text') and ("no match" in str(w.text).lower() or "not found" in str(w.text).lower())) or \
-           (hasattr(w, 'registrar') and w.registrar is None and w.creation_date is None) or \
-           w.expiration_date is None or \
-           (isinstance(w.expiration_date, list) and not w.expiration_date):
-            return "Available"
+def render_metrics_panel(placeholder, metrics: MetricsRecorder, ui_seconds: float):
+    phase_df = pd.DataFrame(metrics.phase_summary())
+    phase_df = pd.concat([phase_df, pd.DataFrame([{
+        "phase": "ui_render", "count": metrics.lookups, "total_s": ui_seconds,
+        "mean_ms": 1000 * ui_seconds / metrics.lookups if metrics.lookups else 0.0,
+    }])], ignore_index=True)
+    with placeholder.container():
+        st.markdown("**⏱️ معیارهای زنده بررسی (زمان هر مرحله)**")
+        col_phases, col_errors = st.columns([3, 1])
+        col_phases.dataframe(phase_df[phase_df["count"] > 0].round(2),
+                             hide_index=True, use_container_width=True)
+        if metrics.error_counts:
+            col_errors.dataframe(
+                pd.DataFrame(sorted(metrics.error_counts.items()),
+                             columns=["error_class", "count"]),
+                hide_index=True, use_container_width=True)
         else:
-            return "Registered"
-    except whois.parser.PywhoisError as e:
-        if "no match for" in str(e).lower() or "no entries found" in str(e).lower():
-            return "Available"
-        return f"Error: WHOIS Lookup ({str(e)})"
-    except Exception as e:
-        common_errors = ["no whois server", "no match", "not found",
-                         "failed to connect", "timed out", "network is unreachable"]
-        if any(err_msg in str(e).lower() for err_msg in common_errors):
-            return "Available"
-        return f"Error: General ({str(e)})"
+            col_errors.caption("خطایی ثبت نشده است.")
+
+
+# فاصله زمانی به‌روزرسانی فهرست کارها و نتایج هنگام اجرای کار پس‌زمینه (ثانیه)
+JOB_POLL_SECONDS = 1.0
 
+JOB_STATE_LABELS = {
+    JOB_QUEUED: "⏳ در صف",
+    JOB_RUNNING: "🔄 در حال اجرا",
+    JOB_CANCELLED: "⏹️ لغو شده",
+    JOB_DONE: "✅ کامل",
+    JOB_FAILED: "❌ خطا",
+}
 
-def save_results_to_json(domains_df: pd.DataFrame,
-                         domain_extension: str,
-                         price_val: str,
-                         list_type_identifier: str) -> str:
-    filename = f"available_domains_{list_type_identifier}_{domain_extension.replace('.', '_')}.json"
 
-    available_domains = domains_df[domains_df["وضعیت"] == "Available"]
-    if available_domains.empty:
+def build_results_df(job: CheckJob) -> pd.DataFrame:
+    """Typed columnar results: categorical TLD, status and word length, string words."""
+    records = job.results()
+    words = [record["word"] for record in records]
+    lengths = [len(word) for word in words]
+    return pd.DataFrame({
+        "ردیف": pd.array([record["index"] + 1 for record in records], dtype="int32"),
+        "کلمه": pd.array(words, dtype="string"),
+        "پسوند": pd.Categorical([record["tld"] for record in records],
+                               categories=sorted(set(job.tlds))),
+        "دامنه کامل": pd.array([record["domain"] for record in records], dtype="string"),
+        "وضعیت": pd.Categorical([record["status"] for record in records]),
+        "طول کلمه": pd.Categorical(lengths, categories=sorted(set(lengths)), ordered=True),
+    })
+
+
+def job_results_view(job: CheckJob) -> dict:
+    """Results of ``job`` and the frames derived from them, memoized across reruns.
+
+    The view lives in session state and is rebuilt only when the job has new
+    records, so changing the sort order or opening an expander re-renders
+    from the cached frames instead of rebuilding them.
+    """
+    view = st.session_state.get("job_results_view")
+    version = (job.id, job.done_count)
+    if view is None or view["version"] != version:
+        view = {"version": version, "df": build_results_df(job), "derived": {}}
+        st.session_state["job_results_view"] = view
+    return view
+
+
+def cached_view(view: dict, key, build):
+    derived = view["derived"]
+    if key not in derived:
+        derived[key] = build()
+    return derived[key]
+
+
+def status_summary(results_df: pd.DataFrame, status: str) -> pd.DataFrame:
+    # فیلتر روی ستون دسته‌ای؛ شماره نمایش همان index است و ستون جدیدی ساخته نمی‌شود
+    summary = results_df.loc[results_df["وضعیت"] == status, ["کلمه", "دامنه کامل"]]
+    summary.index = pd.RangeIndex(1, len(summary) + 1, name="ردیف نمایش")
+    return summary
+
+
+def render_job_results(job: CheckJob):
+    ui_started = time.perf_counter()
+    ui_seconds = st.session_state.setdefault("job_ui_seconds", {})
+    st.subheader(f"⏳ نتایج بررسی: {job.label}")
+
+    if job.active:
+        st.progress(job.progress)
+        st.markdown(f"**تعداد بررسی شده: {job.done_count} از {job.total}**")
+    elif job.state == JOB_DONE:
+        st.success(f"✅ بررسی {job.total} دامنه کامل شد.")
+    elif job.state == JOB_CANCELLED:
         st.warning(
-            f"هیچ دامنه آزاد جدیدی برای لیست '{list_type_identifier}' و پسوند '{domain_extension}' یافت نشد. فایل '{filename}' به‌روز نشد."
-        )
-        return filename
+            f"⏹️ کار لغو شد ({job.done_count} از {job.total} دامنه بررسی شده). "
+            "با «ادامه کار» فقط دامنه‌های باقی‌مانده بررسی می‌شوند.")
+    elif job.state == JOB_FAILED:
+        st.error(f"خطا در اجرای کار: {job.error}")
 
-    try:
-        with open(filename, "r", encoding="utf-8") as f:
-            existing_data = json.load(f)
-            existing_domain_names = {item["domain"] for item in existing_data}
-    except (FileNotFoundError, json.JSONDecodeError):
-        existing_data = []
-        existing_domain_names = set()
-
-    new_domains_to_save = []
-    for index, row in available_domains.iterrows():
-        full_domain_name = row["دامنه کامل"]
-        if full_domain_name not in existing_domain_names:
-            new_domains_to_save.append({
-                "domain": full_domain_name,
-                "checked_at": datetime.datetime.now().isoformat(),
-                "price": price_val
-            })
-
-    if new_domains_to_save:
-        all_data = existing_data + new_domains_to_save
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(all_data, f, indent=4,
-                      sort_keys=True, ensure_ascii=False)
-        st.success(
-            f"{len(new_domains_to_save)} دامنه آزاد جدید در فایل '{filename}' ذخیره شد. مجموعاً {len(all_data)} دامنه در فایل موجود است."
-        )
-    else:
+    render_metrics_panel(st.empty(), job.metrics, ui_seconds.get(job.id, 0.0))
+    if job.resumed_count:
         st.info(
-            f"هیچ دامنه آزاد *جدیدی* برای ذخیره در لیست '{list_type_identifier}' با پسوند '{domain_extension}' یافت نشد. فایل '{filename}' بدون تغییر باقی ماند."
+            f"↩️ {job.resumed_count} دامنه از اجرای ناتمام قبلی بازیابی شد و دوباره بررسی نشد.")
+    if job.use_cache:
+        col_hit, col_miss = st.columns(2)
+        col_hit.metric("برخورد کش (Cache hit)", job.metrics.cache_hits)
+        col_miss.metric("عدم برخورد کش (Cache miss)", job.metrics.cache_misses)
+    if job.prefilter is not None:
+        st.caption(
+            f"⚡ پیش‌فیلتر DNS: {job.prefilter.whois_saved} پرس‌وجوی WHOIS صرفه‌جویی شد، "
+            f"{job.prefilter.passed_through} دامنه به WHOIS ارسال شد.")
+    if job.metrics.retries:
+        st.caption(
+            f"🔁 {job.metrics.retries} تلاش مجدد به دلیل خطای گذرا یا محدودیت نرخ سرور WHOIS انجام شد.")
+
+    view = job_results_view(job)
+    results_df = view["df"]
+    if not results_df.empty:
+        if len(job.tlds) > 1:
+            st.markdown("---")
+            st.subheader("🧮 ماتریس در دسترس بودن (کلمه × پسوند)")
+            st.dataframe(cached_view(view, "matrix",
+                                     lambda: build_availability_matrix(results_df)),
+                         use_container_width=True)
+
+        st.markdown("---")
+        st.subheader("📊 نمایش و مرتب‌سازی نتایج کلی")
+        col_sort1, col_sort2 = st.columns(2)
+        sort_by_column = col_sort1.selectbox(
+            "مرتب‌سازی نتایج بر اساس ستون:",
+            options=["ردیف", "کلمه", "پسوند", "دامنه کامل",
+                     "وضعیت", "طول کلمه"],
+            index=0, key="sort_col_main"
+        )
+        sort_ascending = col_sort2.selectbox(
+            "ترتیب مرتب‌سازی:",
+            options=["صعودی", "نزولی"],
+            index=0, key="sort_order_main"
         )
-    return filename
+        is_ascending = True if sort_ascending == "صعودی" else False
+        if sort_by_column == "ردیف" and is_ascending:
+            sorted_results_df = results_df
+        else:
+            sorted_results_df = cached_view(
+                view, ("sort", sort_by_column, is_ascending),
+                lambda: results_df.sort_values(by=sort_by_column, ascending=is_ascending,
+                                               kind="stable"))
+
+        st.dataframe(sorted_results_df, use_container_width=True, height=min(
+            35 * (len(sorted_results_df) + 1), 600))
+
+        available_domains_summary_df = cached_view(
+            view, "Available", lambda: status_summary(results_df, "Available"))
+        if not available_domains_summary_df.empty:
+            st.success(
+                f"🎉 تعداد دامنه‌های آزاد یافت شده: {len(available_domains_summary_df)}")
+            with st.expander("مشاهده لیست دامنه‌های آزاد (قابل مرتب‌سازی با کلیک روی هدر ستون)"):
+                st.dataframe(available_domains_summary_df,
+                             key='df_available', use_container_width=True)
+        else:
+            st.info("ℹ️ هیچ دامنه آزادی در این بررسی یافت نشد.")
+
+        registered_domains_summary_df = cached_view(
+            view, "Registered", lambda: status_summary(results_df, "Registered"))
+        if not registered_domains_summary_df.empty:
+            st.error(
+                f"🚫 تعداد دامنه‌های ثبت شده یافت شده: {len(registered_domains_summary_df)}")
+            with st.expander("مشاهده لیست دامنه‌های ثبت شده (قابل مرتب‌سازی با کلیک روی هدر ستون)"):
+                st.dataframe(registered_domains_summary_df,
+                             key='df_registered', use_container_width=True)
+        else:
+            st.info("ℹ️ هیچ دامنه ثبت شده‌ای در این بررسی یافت نشد.")
+
+        st.markdown(f"💾 نتایج در فایل `{job.store_path}` ذخیره می‌شود.")
+    ui_seconds[job.id] = ui_seconds.get(job.id, 0.0) + time.perf_counter() - ui_started
+
+
+def render_jobs_panel():
+    manager = get_job_manager()
+    jobs = manager.jobs()
+    if not jobs:
+        return
+    if st.session_state.get("jobs_polling") and not manager.has_active():
+        # آخرین کار تمام شد؛ اجرای کامل صفحه نظرسنجی دوره‌ای را متوقف می‌کند
+        st.session_state["jobs_polling"] = False
+        st.rerun()
+
+    st.markdown("---")
+    st.header("🗂️ کارهای بررسی در پس‌زمینه")
+    st.dataframe(pd.DataFrame([{
+        "کار": f"#{snapshot['id']}",
+        "عنوان": snapshot["label"],
+        "وضعیت": JOB_STATE_LABELS[snapshot["state"]],
+        "پیشرفت": snapshot["progress"],
+        "بررسی شده": f"{snapshot['done']} / {snapshot['total']}",
+        "زمان (ثانیه)": round(snapshot["elapsed_s"], 1),
+    } for snapshot in (job.snapshot() for job in jobs)]),
+        column_config={"پیشرفت": st.column_config.ProgressColumn(
+            "پیشرفت", min_value=0.0, max_value=1.0)},
+        hide_index=True, use_container_width=True)
+
+    if "pending_job_view" in st.session_state:
+        st.session_state["job_view_selector"] = st.session_state.pop(
+            "pending_job_view")
+    selected_job_id = st.selectbox(
+        "نمایش نتایج کار:", options=[job.id for job in jobs],
+        format_func=lambda job_id: f"#{job_id} - {manager.get(job_id).label}",
+        key="job_view_selector")
+    job = manager.get(selected_job_id)
+
+    col_cancel, col_resume = st.columns(2)
+    if col_cancel.button("⏹️ لغو کار", disabled=not job.active,
+                         use_container_width=True, key="cancel_job_button"):
+        manager.cancel(job.id)
+        st.rerun()
+    if col_resume.button("▶️ ادامه کار", disabled=job.active or job.state == JOB_DONE,
+                         use_container_width=True, key="resume_job_button"):
+        st.session_state["pending_job_view"] = manager.resume(job.id).id
+        st.rerun()
+
+    render_job_results(job)
 
 
 def main():
@@ -213,12 +316,15 @@ def main():
             min_value=0, value=10, step=10,
             key="random_word_count_dict"  # Added key
         )
+        pronounceable_only = st.sidebar.checkbox(
+            "فقط کلمات قابل تلفظ (صامت و مصوت یک‌درمیان، مثل CVCV)",
+            value=False, key="pronounceable_only")
         if word_count_for_dict > 0:
             if st.sidebar.button("تولید و ذخیره لیست‌های تصادفی جدید", key="gen_random_btn"):
                 three_letter_words = generate_random_words(
-                    word_count_for_dict, 3)
+                    word_count_for_dict, 3, pronounceable_only)
                 four_letter_words = generate_random_words(
-                    word_count_for_dict, 4)
+                    word_count_for_dict, 4, pronounceable_only)
                 save_words_to_json(three_letter_words,
                                    "three_letter_words.json")
                 save_words_to_json(four_letter_words, "four_letter_words.json")
@@ -265,26 +371,41 @@ def main():
     sort_option = st.selectbox("مرتب‌سازی پسوندها بر اساس قیمت:", [
                                "بدون مرتب‌سازی", "صعودی", "نزولی"], key="tld_sort_option")
 
-    sorted_extensions_dict = domain_extensions.copy()
+    # ترتیب‌های مرتب‌شده بر اساس قیمت یک بار در هسته محاسبه شده‌اند
+    sorted_extensions_dict = domain_extensions
     if sort_option == "صعودی":
-        sorted_extensions_dict = dict(
-            sorted(domain_extensions.items(),
-                   key=lambda item: price_to_number(item[1][1]))
-        )
+        sorted_extensions_dict = extensions_sorted_by_price()
     elif sort_option == "نزولی":
-        sorted_extensions_dict = dict(
-            sorted(domain_extensions.items(),
-                   key=lambda item: price_to_number(item[1][1]), reverse=True)
+        sorted_extensions_dict = extensions_sorted_by_price(descending=True)
+
+    check_mode = st.radio("حالت بررسی:", ["تک پسوند", "چند پسوند"],
+                          horizontal=True, key="tld_check_mode")
+
+    if check_mode == "تک پسوند":
+        selectbox_options = list(sorted_extensions_dict.items())
+        selected_key_id = st.selectbox(
+            "یک پسوند دامنه انتخاب کنید:",
+            options=[item[0] for item in selectbox_options],
+            format_func=lambda key_id_func: f"{sorted_extensions_dict[key_id_func][0]} - قیمت: {sorted_extensions_dict[key_id_func][1]}",
+            key="tld_selector"
         )
-
-    selectbox_options = list(sorted_extensions_dict.items())
-    selected_key_id = st.selectbox(
-        "یک پسوند دامنه انتخاب کنید:",
-        options=[item[0] for item in selectbox_options],
-        format_func=lambda key_id_func: f"{sorted_extensions_dict[key_id_func][0]} - قیمت: {sorted_extensions_dict[key_id_func][1]}",
-        key="tld_selector"
-    )
-    domain_extension_val, price_val = sorted_extensions_dict[selected_key_id]
+        target_extensions = [sorted_extensions_dict[selected_key_id]]
+    else:
+        max_price = st.number_input(
+            "سقف قیمت پسوندها (پسوندهای ارزان‌تر از پیش انتخاب می‌شوند):",
+            min_value=0, value=5000000, step=500000, key="tld_price_ceiling"
+        )
+        selected_key_ids = st.multiselect(
+            "پسوندهای دامنه را انتخاب کنید:",
+            options=list(sorted_extensions_dict.keys()),
+            default=[key for key in sorted_extensions_dict
+                     if key in set(extensions_under_price(max_price))],
+            format_func=lambda key_id_func: f"{sorted_extensions_dict[key_id_func][0]} - قیمت: {sorted_extensions_dict[key_id_func][1]}",
+            key="tld_multi_selector"
+        )
+        target_extensions = [sorted_extensions_dict[key]
+                             for key in selected_key_ids]
+    extension_labels = "، ".join(tld for tld, _ in target_extensions)
 
     if word_source_key == "تصادفی":
         st.header("🔢 تعداد دامنه‌ها برای بررسی (از لیست تصادفی)")
@@ -295,6 +416,27 @@ def main():
             "تعداد دامنه‌های ۴ حرفی برای بررسی:", min_value=0, value=5, step=5, key="four_check_count"
         )
 
+    max_workers = st.number_input(
+        "تعداد بررسی‌های هم‌زمان (WHOIS):",
+        min_value=1, max_value=64, value=DEFAULT_MAX_WORKERS, step=1,
+        key="max_workers_input"
+    )
+    server_rate = st.number_input(
+        "حداکثر پرس‌وجو در ثانیه برای هر سرور WHOIS:",
+        min_value=0.1, max_value=20.0, value=DEFAULT_SERVER_RATE, step=0.5,
+        key="server_rate_input"
+    )
+    whois_backend = st.selectbox(
+        "روش پرس‌وجو:", options=list(WHOIS_BACKENDS),
+        format_func=lambda backend: {"raw": "کلاینت سبک داخلی (RDAP / WHOIS خام)",
+                                     "python-whois": "python-whois (تجزیه کامل)"}[backend],
+        key="whois_backend")
+    use_whois_cache = st.checkbox(
+        "استفاده از کش نتایج WHOIS", value=True, key="use_whois_cache")
+    use_dns_prefilter = st.checkbox(
+        "پیش‌فیلتر DNS (دامنه‌های دارای NS بدون WHOIS «ثبت شده» علامت می‌خورند)",
+        value=False, disabled=domain_checker.dns is None, key="use_dns_prefilter")
+
     if st.button("🚀 شروع بررسی دامنه‌ها", type="primary", use_container_width=True, key="start_check_button"):
         final_words_to_process = []
 
@@ -332,97 +474,18 @@ def main():
             else:
                 final_words_to_process.extend(words_to_check_from_source)
 
-        if final_words_to_process:
-            st.subheader(
-                f"⏳ نتایج بررسی برای پسوند {domain_extension_val} (از لیست: {word_source_options[word_source_key]})")
-
-            results_data = []
-            total_words = len(final_words_to_process)
-            progress_bar_check = st.progress(0)
-            status_text_check = st.empty()
-            processed_count_placeholder = st.empty()
-
-            for idx, word_prefix in enumerate(final_words_to_process):
-                full_domain = word_prefix + domain_extension_val
-                status = check_domain_availability(full_domain)
-                results_data.append({
-                    "ردیف": idx + 1,
-                    "کلمه": word_prefix,
-                    "دامنه کامل": full_domain,
-                    "وضعیت": status,
-                    "طول کلمه": len(word_prefix)
-                })
-
-                progress = (idx + 1) / total_words
-                progress_bar_check.progress(progress)
-                status_text_check.text(f"در حال بررسی: {full_domain}")
-                processed_count_placeholder.markdown(
-                    f"**تعداد بررسی شده: {idx + 1} از {total_words}**")
-
-            progress_bar_check.empty()
-            status_text_check.success(f"✅ بررسی {total_words} دامنه کامل شد.")
-            processed_count_placeholder.empty()
-
-            if results_data:
-                results_df = pd.DataFrame(results_data)
-
-                st.markdown("---")
-                st.subheader("📊 نمایش و مرتب‌سازی نتایج کلی")
-                col_sort1, col_sort2 = st.columns(2)
-                sort_by_column = col_sort1.selectbox(
-                    "مرتب‌سازی نتایج بر اساس ستون:",
-                    options=["ردیف", "کلمه", "دامنه کامل",
-                             "وضعیت", "طول کلمه"],
-                    index=0, key="sort_col_main"
-                )
-                sort_ascending = col_sort2.selectbox(
-                    "ترتیب مرتب‌سازی:",
-                    options=["صعودی", "نزولی"],
-                    index=0, key="sort_order_main"
-                )
-                is_ascending = True if sort_ascending == "صعودی" else False
-
-                if sort_by_column in ["ردیف", "طول کلمه"]:
-                    results_df[sort_by_column] = pd.to_numeric(
-                        results_df[sort_by_column])
-                sorted_results_df = results_df.sort_values(
-                    by=sort_by_column, ascending=is_ascending)
-
-                st.dataframe(sorted_results_df, use_container_width=True, height=min(
-                    35 * (len(sorted_results_df) + 1), 600))
-
-                available_domains_summary_df = results_df[results_df["وضعیت"] == "Available"].copy(
-                )
-                if not available_domains_summary_df.empty:
-                    available_domains_summary_df.reset_index(
-                        drop=True, inplace=True)
-                    available_domains_summary_df['ردیف نمایش'] = available_domains_summary_df.index + 1
-                    st.success(
-                        f"🎉 تعداد دامنه‌های آزاد یافت شده: {len(available_domains_summary_df)}")
-                    with st.expander("مشاهده لیست دامنه‌های آزاد (قابل مرتب‌سازی با کلیک روی هدر ستون)"):
-                        st.dataframe(available_domains_summary_df[[
-                                     'ردیف نمایش', 'کلمه', 'دامنه کامل']], key='df_available', use_container_width=True)
-                else:
-                    st.info("ℹ️ هیچ دامنه آزادی در این بررسی یافت نشد.")
-
-                registered_domains_summary_df = results_df[results_df["وضعیت"] == "Registered"].copy(
-                )
-                if not registered_domains_summary_df.empty:
-                    registered_domains_summary_df.reset_index(
-                        drop=True, inplace=True)
-                    registered_domains_summary_df['ردیف نمایش'] = registered_domains_summary_df.index + 1
-                    st.error(
-                        f"🚫 تعداد دامنه‌های ثبت شده یافت شده: {len(registered_domains_summary_df)}")
-                    with st.expander("مشاهده لیست دامنه‌های ثبت شده (قابل مرتب‌سازی با کلیک روی هدر ستون)"):
-                        st.dataframe(registered_domains_summary_df[[
-                                     'ردیف نمایش', 'کلمه', 'دامنه کامل']], key='df_registered', use_container_width=True)
-                else:
-                    st.info("ℹ️ هیچ دامنه ثبت شده‌ای در این بررسی یافت نشد.")
-
-                saved_filename = save_results_to_json(
-                    results_df, domain_extension_val, price_val, list_type_id_for_save)
-                st.markdown(
-                    f"💾 نتایج در فایل `{saved_filename}` ذخیره/به‌روزرسانی شد.")
+        if final_words_to_process and not target_extensions:
+            st.error("هیچ پسوندی برای بررسی انتخاب نشده است.")
+        elif final_words_to_process:
+            # بررسی در پس‌زمینه اجرا می‌شود تا با تعامل بعدی کاربر از بین نرود
+            job = get_job_manager().submit(
+                final_words_to_process, [tld for tld, _ in target_extensions],
+                list_type_id_for_save,
+                label=f"{word_source_options[word_source_key]} ({extension_labels})",
+                max_workers=max_workers, use_cache=use_whois_cache, rate=server_rate,
+                backend=whois_backend, use_dns_prefilter=use_dns_prefilter)
+            st.session_state["pending_job_view"] = job.id
+            st.toast(f"کار #{job.id} برای بررسی {job.total} دامنه در صف قرار گرفت.")
 
         elif word_source_key == "تصادفی":
             # This condition is a bit tricky now due to locals() check.
@@ -438,6 +501,11 @@ def main():
             st.error(
                 f"لیست کلمات '{word_source_options[word_source_key]}' برای پردازش خالی است.")
 
+    # فهرست کارها در یک fragment به‌روز می‌شود؛ تا وقتی کاری فعال است هر چند لحظه یک‌بار
+    polling = get_job_manager().has_active()
+    st.session_state["jobs_polling"] = polling
+    st.fragment(run_every=JOB_POLL_SECONDS if polling else None)(render_jobs_panel)()
+
 
 if __name__ == "__main__":
     main()
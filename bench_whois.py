@@ -0,0 +1,298 @@
+"""Throughput/latency benchmark of the checker against a local fake WHOIS server.
+
+The fake server speaks the port-43 protocol (one query line in, a text body
+out, connection closed) with configurable latency, error rate and share of
+"No match" (available) answers. Both WHOIS backends are pointed at it (the
+built-in client via ``connect_to``, python-whois by redirecting its sockets),
+so the real engine — scheduler, retries and concurrent pool — runs end to end
+without touching a registry::
+
+    python bench_whois.py --concurrency 1 8 32 --latency 0.05 --error-rate 0.02
+"""
+import argparse
+import hashlib
+import random
+import socket
+import socketserver
+import statistics
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from whois.whois import NICClient
+
+import domain_checker
+from domain_checker import (WHOIS_BACKENDS, WhoisScheduler, check_domains_concurrently,
+                            load_words_from_json, lookup_phase)
+from whois_client import WhoisClient
+
+BUNDLED_WORD_LISTS = [
+    "curated_100_ai_trade_words.json",
+    "curated_500_ai_trade_words.json",
+    "curated_ai_trade_words.json",
+    "three_letter_words.json",
+    "four_letter_words.json",
+]
+
+REGISTERED_BODY = """Domain Name: {domain}
+Registry Domain ID: {domain_id}
+Updater WHOIS: whois.example-registrar.test
+Creation Date: 2015-03-14T09:26:53Z
+Registry Expiry Date: 2030-03-14T09:26:53Z
+Registrar: Example Registrar, LLC
+Domain Status: clientTransferProhibited
+Name Server: ns1.example-dns.test
+Name Server: ns2.example-dns.test
+"""
+AVAILABLE_BODY = 'No match for "{domain}".\n'
+RATE_LIMIT_BODY = "Query rate limit exceeded. Please try again later.\n"
+
+
+class FakeWhoisServer(socketserver.ThreadingTCPServer):
+    """Threaded port-43 stand-in whose availability answers are a stable hash of the domain."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, available_ratio: float = 0.3,
+                 seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.available_ratio = available_ratio
+        self.queries = 0
+        self.errors_injected = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        super().__init__((host, port), _FakeWhoisHandler)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.server_address[0], self.server_address[1]
+
+    def is_available(self, domain: str) -> bool:
+        digest = hashlib.sha1(domain.lower().encode("utf-8")).digest()
+        return int.from_bytes(digest[:4], "big") / 2 ** 32 < self.available_ratio
+
+    def respond(self, query: str) -> Optional[str]:
+        """Return the body for ``query``, or None to drop the connection."""
+        with self._lock:
+            self.queries += 1
+            delay = max(0.0, self.latency +
+                        self._random.uniform(-self.jitter, self.jitter))
+            inject_error = self._random.random() < self.error_rate
+            drop = inject_error and self._random.random() < 0.5
+            if inject_error:
+                self.errors_injected += 1
+        time.sleep(delay)
+        if "." not in query:
+            # پرس‌وجوی IANA برای یافتن سرور WHOIS پسوند
+            return f"refer: whois.nic.{query}\nwhois: whois.nic.{query}\n"
+        if inject_error:
+            return None if drop else RATE_LIMIT_BODY
+        if self.is_available(query):
+            return AVAILABLE_BODY.format(domain=query.upper())
+        domain_id = hashlib.md5(query.encode("utf-8")).hexdigest()[:12]
+        return REGISTERED_BODY.format(domain=query.upper(), domain_id=domain_id)
+
+    def start(self) -> "FakeWhoisServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _FakeWhoisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        query = self.rfile.readline().decode("utf-8", "replace").strip()
+        body = self.server.respond(query)
+        if body is not None:
+            self.wfile.write(body.encode("utf-8"))
+
+
+@contextmanager
+def redirect_whois_to(address: Tuple[str, int]) -> Iterator[None]:
+    """Send every python-whois connection (any host, port 43) to ``address``."""
+    original_get_socket = NICClient.get_socket
+
+    class _RedirectedSocket(socket.socket):
+        def connect(self, _address):
+            super().connect(address)
+
+    NICClient.get_socket = staticmethod(
+        lambda: _RedirectedSocket(socket.AF_INET, socket.SOCK_STREAM))
+    try:
+        yield
+    finally:
+        NICClient.get_socket = original_get_socket
+
+
+class TimedScheduler(WhoisScheduler):
+    """Scheduler that records the wall time of every lookup, retries included."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies: List[float] = []
+
+    def lookup(self, domain: str):
+        started = time.perf_counter()
+        result = super().lookup(domain)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.latencies.append(elapsed)
+        return result
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_level(server: FakeWhoisServer, domains: List[str], concurrency: int,
+              rate: float, max_retries: int, backend: str = "raw",
+              trace_memory: bool = False) -> Dict[str, float]:
+    client = None
+    if backend == "raw":
+        client = WhoisClient(use_rdap=False, connect_to=server.address,
+                             phase=lookup_phase)
+    scheduler = TimedScheduler(rate=rate, burst=max(1, int(rate)), max_retries=max_retries,
+                               base_delay=0.01, max_delay=0.1, backend=backend, client=client)
+    statuses: Dict[str, str] = {}
+    if trace_memory:
+        tracemalloc.start()
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    for _, domain, status in check_domains_concurrently(domains, concurrency, False, scheduler):
+        statuses[domain] = status
+    elapsed = time.perf_counter() - started
+    # زمان CPU شامل کار سرور جعلی هم هست؛ برای مقایسه دو backend یکسان است
+    cpu_seconds = time.process_time() - cpu_started
+    peak_memory = 0
+    if trace_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    correct = false_available = false_registered = errors = 0
+    for domain, status in statuses.items():
+        expected = "Available" if server.is_available(domain) else "Registered"
+        if status == expected:
+            correct += 1
+        elif status.startswith("Error"):
+            errors += 1
+        elif status == "Available":
+            false_available += 1
+        else:
+            false_registered += 1
+    latencies = scheduler.latencies
+    return {
+        "backend": backend,
+        "concurrency": concurrency,
+        "domains": len(domains),
+        "domains_per_sec": len(domains) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "accuracy": correct / len(domains) if domains else 0.0,
+        "false_available": false_available,
+        "false_registered": false_registered,
+        "errors": errors,
+        "retries": scheduler.retries,
+        "cpu_ms_per_lookup": 1000 * cpu_seconds / len(domains) if domains else 0.0,
+        "peak_kib": peak_memory / 1024,
+    }
+
+
+def load_bench_domains(word_files: List[str], tlds: List[str], limit: Optional[int]) -> List[str]:
+    words: List[str] = []
+    for filename in word_files:
+        words.extend(load_words_from_json(filename))
+    words = list(dict.fromkeys(word.lower() for word in words))
+    domains = [word + tld for word in words for tld in tlds]
+    return domains[:limit] if limit else domains
+
+
+def format_report(rows: List[Dict[str, float]]) -> str:
+    header = (f"{'backend':>12} {'workers':>7} {'domains':>7} {'dom/s':>9} {'p50 ms':>8} "
+              f"{'p95 ms':>8} {'p99 ms':>8} {'accuracy':>8} {'false+':>6} {'false-':>6} "
+              f"{'errors':>6} {'retries':>7} {'cpu ms':>7} {'peak KiB':>9}")
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        lines.append(
+            f"{row['backend']:>12} {row['concurrency']:>7} {row['domains']:>7} "
+            f"{row['domains_per_sec']:>9.1f} "
+            f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+            f"{row['accuracy']:>8.2%} {row['false_available']:>6} {row['false_registered']:>6} "
+            f"{row['errors']:>6} {row['retries']:>7} {row['cpu_ms_per_lookup']:>7.2f} "
+            f"{row['peak_kib']:>9.0f}")
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", nargs="+", default=BUNDLED_WORD_LISTS,
+                        help="word list JSON files (default: all bundled lists)")
+    parser.add_argument("--tld", nargs="+", default=[".io"],
+                        help="TLDs to combine with the words (default: %(default)s)")
+    parser.add_argument("--limit", type=int, default=2000,
+                        help="max domains per concurrency level, 0 for all (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32],
+                        help="worker counts to measure (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="mean server response latency in seconds (default: %(default)s)")
+    parser.add_argument("--jitter", type=float, default=0.02,
+                        help="uniform +/- latency jitter in seconds (default: %(default)s)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="share of replies that are dropped or rate-limited (default: %(default)s)")
+    parser.add_argument("--available-ratio", type=float, default=0.3,
+                        help="share of domains answered with 'No match' (default: %(default)s)")
+    parser.add_argument("--rate", type=float, default=1000.0,
+                        help="scheduler per-server rate limit in queries/sec (default: %(default)s)")
+    parser.add_argument("--max-retries", type=int, default=domain_checker.DEFAULT_MAX_RETRIES,
+                        help="scheduler retries for transient errors (default: %(default)s)")
+    parser.add_argument("--backend", nargs="+", choices=WHOIS_BACKENDS, default=["raw"],
+                        help="WHOIS backends to compare (default: %(default)s)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="report peak Python memory per level (slows the run)")
+    parser.add_argument("--port", type=int, default=0,
+                        help="port for the fake server, 0 for any free port (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=1234)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    # پاسخ‌های سرور جعلی نباید وارد تاریخچه بررسی‌ها شوند
+    domain_checker.RECORD_HISTORY = False
+    domains = load_bench_domains(args.words, args.tld, args.limit)
+    if not domains:
+        print("No domains to benchmark.")
+        return 1
+    server = FakeWhoisServer(port=args.port, latency=args.latency, jitter=args.jitter,
+                             error_rate=args.error_rate, available_ratio=args.available_ratio,
+                             seed=args.seed).start()
+    rows = []
+    try:
+        with redirect_whois_to(server.address):
+            for backend in args.backend:
+                for concurrency in args.concurrency:
+                    rows.append(run_level(server, domains, concurrency, args.rate,
+                                          args.max_retries, backend, args.trace_memory))
+                    print(format_report(rows[-1:]).splitlines()[-1], flush=True)
+    finally:
+        server.stop()
+    print()
+    print(format_report(rows))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,229 @@
+"""Headless command-line entry point for bulk domain checks.
+
+Example::
+
+    python cli.py --words curated_500_ai_trade_words.json --tld .io .app \
+        --workers 16 --output results.jsonl
+
+Spend a fixed budget on the most valuable names first (short words, curated
+lists, cheap TLDs)::
+
+    python cli.py --words curated_100_ai_trade_words.json curated_ai_trade_words.json \
+        --max-price 5000000 --max-lookups 300 --max-seconds 600
+
+Re-check only the names whose expiry is close or whose last check is stale
+(after importing an old ``available_domains_*.json`` into the history)::
+
+    python cli.py --import-history available_domains_curated_100_creative__digital.json \
+        --drop-watch --limit 200
+
+Only ``domain_checker`` is imported, so neither streamlit nor pandas is loaded.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import List, Optional
+
+from domain_checker import (DEFAULT_DROP_WATCH_LIMIT, DEFAULT_MAX_WORKERS, DEFAULT_SERVER_RATE,
+                            DEFAULT_WHOIS_BACKEND, WHOIS_BACKENDS, DnsPrefilter,
+                            MetricsRecorder, ResultStore, WhoisScheduler, check_words, domain_extensions,
+                            extensions_under_price, get_whois_cache, import_history,
+                            iter_words, make_run_id, normalize_tld, plan_search, recheck_due,
+                            run_search_plan)
+
+RESULT_FIELDS = ["word", "tld", "domain", "status", "checked_at"]
+PLAN_FIELDS = RESULT_FIELDS + ["score"]
+DROP_WATCH_FIELDS = ["domain", "status", "previous_status", "changed", "reason",
+                     "expiration_date", "previous_checked_at", "checked_at"]
+METRICS_WRITE_EVERY = 100
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Check the availability of word x TLD domains without the Streamlit UI.")
+    parser.add_argument("--words", nargs="+", default=[],
+                        help="word lists: JSON arrays or text files with one word per line "
+                             "(streamed, so they may hold millions of words)")
+    parser.add_argument("--tld", nargs="+", default=[],
+                        help="TLDs to check, e.g. .io .app")
+    parser.add_argument("--max-price", type=float,
+                        help="also check every known TLD priced at or below this value "
+                             "(TLDs passed with --tld are always checked)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS,
+                        help="number of concurrent lookups (default: %(default)s)")
+    parser.add_argument("--rate", type=float, default=DEFAULT_SERVER_RATE,
+                        help="max queries per second per WHOIS server (default: %(default)s)")
+    parser.add_argument("--backend", choices=WHOIS_BACKENDS, default=DEFAULT_WHOIS_BACKEND,
+                        help="WHOIS implementation (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="bypass the on-disk WHOIS cache")
+    parser.add_argument("--dns-prefilter", action="store_true",
+                        help="mark domains with NS records as Registered without WHOIS")
+    parser.add_argument("--store",
+                        help="append-only JSONL result store; an interrupted run resumes from it")
+    parser.add_argument("--metrics-file",
+                        help="write per-phase lookup metrics here in Prometheus text format")
+    parser.add_argument("--max-lookups", type=int,
+                        help="plan mode: check only the N best-scoring word x TLD pairs")
+    parser.add_argument("--max-seconds", type=float,
+                        help="plan mode: stop checking after this many seconds")
+    parser.add_argument("--import-history", nargs="+", default=[], metavar="FILE",
+                        help="add old results (available_domains_*.json or results_*.jsonl) "
+                             "to the check history")
+    parser.add_argument("--drop-watch", action="store_true",
+                        help="re-check history entries near expiry or stale instead of --words")
+    parser.add_argument("--limit", type=int, default=DEFAULT_DROP_WATCH_LIMIT,
+                        help="max domains re-checked by --drop-watch (default: %(default)s)")
+    parser.add_argument("--output", default="-",
+                        help="output file, '-' for stdout (default: %(default)s)")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="output format (default: inferred from --output, else jsonl)")
+    return parser.parse_args(argv)
+
+
+def resolve_tlds(args: argparse.Namespace) -> List[str]:
+    tlds = [normalize_tld(tld) for tld in args.tld]
+    if args.max_price is not None:
+        tlds.extend(domain_extensions[key][0]
+                    for key in extensions_under_price(args.max_price))
+    return list(dict.fromkeys(tlds))
+
+
+def load_history_file(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        if not path.endswith(".jsonl"):
+            return json.load(f)
+        records = []
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return records
+
+
+def write_metrics(metrics: MetricsRecorder, path: str):
+    # جایگزینی اتمی تا جمع‌کننده‌های Prometheus فایل نیمه‌کاره نخوانند
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(metrics.to_prometheus())
+    os.replace(tmp_path, path)
+
+
+def open_output(args: argparse.Namespace):
+    output_format = args.format or (
+        "csv" if args.output.endswith(".csv") else "jsonl")
+    out = sys.stdout if args.output == "-" else open(
+        args.output, "w", encoding="utf-8", newline="")
+    return out, output_format
+
+
+def run_drop_watch(args: argparse.Namespace) -> int:
+    out, output_format = open_output(args)
+    scheduler = WhoisScheduler(rate=args.rate, backend=args.backend)
+    prefilter = DnsPrefilter() if args.dns_prefilter else None
+    changed = 0
+    try:
+        writer = None
+        if output_format == "csv":
+            writer = csv.DictWriter(out, fieldnames=DROP_WATCH_FIELDS)
+            writer.writeheader()
+        for done_count, record in enumerate(
+                recheck_due(args.limit, args.workers, scheduler, prefilter), start=1):
+            changed += record["changed"]
+            if writer is not None:
+                writer.writerow(record)
+            else:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            print(f"[{done_count}] {record['domain']} ({record['reason']}): "
+                  f"{record['previous_status']} -> {record['status']}", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"status changed for {changed} domains", file=sys.stderr)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    for path in args.import_history:
+        count = import_history(load_history_file(path))
+        print(f"imported {count} history entries from '{path}'", file=sys.stderr)
+    if args.drop_watch:
+        return run_drop_watch(args)
+    if not args.words:
+        if args.import_history:
+            return 0
+        print("Pass --words (or --drop-watch).", file=sys.stderr)
+        return 1
+    # فایل‌ها دو بار جریانی خوانده می‌شوند (شمارش و بررسی) تا کامل در حافظه نمانند
+    try:
+        word_count = sum(1 for path in args.words for _ in iter_words(path))
+    except ValueError as e:
+        print(f"Invalid word list: {e}", file=sys.stderr)
+        return 1
+    if not word_count:
+        print(f"No words loaded from {', '.join(args.words)}.", file=sys.stderr)
+        return 1
+    tlds = resolve_tlds(args)
+    if not tlds:
+        print("No TLDs selected; pass --tld and/or --max-price.", file=sys.stderr)
+        return 1
+
+    plan_mode = args.max_lookups is not None or args.max_seconds is not None
+    fields = PLAN_FIELDS if plan_mode else RESULT_FIELDS
+    out, output_format = open_output(args)
+    scheduler = WhoisScheduler(rate=args.rate, backend=args.backend)
+    prefilter = DnsPrefilter() if args.dns_prefilter else None
+    store = ResultStore(args.store) if args.store else None
+    list_id = "+".join(os.path.splitext(os.path.basename(path))[0] for path in args.words)
+    metrics = MetricsRecorder() if args.metrics_file else None
+    if plan_mode:
+        plan = plan_search({path: iter_words(path) for path in args.words}, tlds,
+                           args.max_price, args.max_lookups,
+                           keep_tlds=[normalize_tld(tld) for tld in args.tld])
+        total = len(plan)
+        records = run_search_plan(plan, args.max_seconds, args.workers, not args.no_cache,
+                                  scheduler, prefilter, store,
+                                  make_run_id("plan:" + list_id, tlds), metrics)
+    else:
+        total = word_count * len(tlds)
+        words = (word for path in args.words for word in iter_words(path))
+        records = check_words(words, tlds, args.workers, not args.no_cache, scheduler,
+                              prefilter, store, make_run_id(list_id, tlds), metrics)
+    try:
+        writer = None
+        if output_format == "csv":
+            writer = csv.DictWriter(
+                out, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+        for done_count, record in enumerate(records, start=1):
+            if writer is not None:
+                writer.writerow(record)
+            else:
+                out.write(json.dumps({field: record[field] for field in fields},
+                                     ensure_ascii=False) + "\n")
+            out.flush()
+            print(f"[{done_count}/{total}] {record['domain']}: {record['status']}",
+                  file=sys.stderr)
+            if metrics is not None and done_count % METRICS_WRITE_EVERY == 0:
+                write_metrics(metrics, args.metrics_file)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if store is not None:
+            store.close()
+        if metrics is not None:
+            write_metrics(metrics, args.metrics_file)
+
+    if not args.no_cache:
+        cache = get_whois_cache()
+        print(f"cache hits: {cache.hits}, misses: {cache.misses}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
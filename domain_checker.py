@@ -0,0 +1,1516 @@
+"""Streamlit-free core of the domain checker.
+
+Everything needed to check domains in bulk lives here so it can be driven from
+the Streamlit app, the command line (``cli.py``) or any other Python process
+without importing streamlit or pandas.
+"""
+import bisect
+import datetime
+import heapq
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Any, Callable, Container, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from whois.parser import WhoisEntry
+from whois.whois import NICClient
+
+from whois_client import REGISTERED_PATTERN, TRANSIENT_ERROR_PREFIX, WhoisClient
+
+try:
+    from whois.exceptions import PywhoisError
+except ImportError:  # python-whois < 0.9
+    from whois.parser import PywhoisError
+
+try:
+    import dns.exception
+    import dns.resolver
+except ImportError:  # پیش‌فیلتر DNS اختیاری است
+    dns = None
+
+# --- توابع مربوط به بارگذاری و ذخیره لیست کلمات ---
+
+
+def save_words_to_json(word_list: List[str], filename: str):
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(word_list, f, indent=4, ensure_ascii=False)
+
+
+# لیست‌های خوانده‌شده بر اساس مسیر نگه داشته می‌شوند و فقط با تغییر فایل دوباره خوانده می‌شوند
+_word_list_cache: Dict[str, Tuple[Tuple[int, int], List[str]]] = {}
+_word_list_cache_lock = threading.Lock()
+
+
+def load_words_from_json(filename: str) -> List[str]:
+    """Load a JSON word list, re-parsing it only when the file's mtime or size changed."""
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return []
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _word_list_cache_lock:
+        cached = _word_list_cache.get(filename)
+    if cached is None or cached[0] != signature:
+        try:
+            with open(filename, "r", encoding="utf-8") as f:
+                words = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+        cached = (signature, words)
+        with _word_list_cache_lock:
+            _word_list_cache[filename] = cached
+    # کپی سطحی تا تغییر لیست توسط فراخواننده کش را خراب نکند
+    return list(cached[1])
+
+
+WORD_STREAM_CHUNK_SIZE = 1 << 16
+# عنصری که پس از این تعداد نویسه هنوز کامل نشده نامعتبر است، نه بریده‌شده بین دو تکه
+MAX_JSON_ELEMENT_CHARS = 4096
+
+
+def _iter_json_array(f, chunk_size: int) -> Iterator[str]:
+    """Decode a top-level JSON array of strings one element at a time.
+
+    Raises ``ValueError`` for anything else (nested values, numbers, missing
+    commas, a truncated file) instead of guessing.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+    # حالت‌ها: قبل از «[»، اولین عنصر یا «]»، عنصر بعد از «,»، و «,» یا «]» بعد از عنصر
+    state = "start"
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n":
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                if state == "start":
+                    return
+                raise ValueError("unexpected end of file inside the JSON array")
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        char = buffer[pos]
+        if state == "start":
+            if char != "[":
+                raise ValueError("expected a JSON array of strings")
+            pos += 1
+            state = "first"
+        elif char == "]" and state in ("first", "after"):
+            return
+        elif state == "after":
+            if char != ",":
+                raise ValueError(f"expected ',' or ']' in the JSON array, got {char!r}")
+            pos += 1
+            state = "value"
+        elif char != '"':
+            raise ValueError(f"expected a string in the JSON array, got {buffer[pos:pos + 20]!r}")
+        else:
+            try:
+                value, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if eof or len(buffer) - pos > max(chunk_size, MAX_JSON_ELEMENT_CHARS):
+                    raise ValueError(f"invalid element in the JSON array: {e.msg}") from e
+                # رشته بین دو تکه خوانده‌شده بریده شده است
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            yield value
+            state = "after"
+
+
+def iter_words(filename: str, chunk_size: int = WORD_STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """Stream words from a file without loading it whole.
+
+    ``.json`` files must hold one array of strings and are decoded element by
+    element (``ValueError`` if they hold anything else); any other file is
+    read as one word per line (blank lines and ``#`` comments skipped).
+    Memory use stays flat for multi-million entries.
+    """
+    try:
+        f = open(filename, "r", encoding="utf-8")
+    except OSError:
+        return
+    with f:
+        if filename.endswith(".json"):
+            for value in _iter_json_array(f, chunk_size):
+                if value:
+                    yield value
+        else:
+            for line in f:
+                word = line.strip()
+                if word and not word.startswith("#"):
+                    yield word
+
+
+# --- دیکشنری پسوندها و قیمت‌ها ---
+domain_extensions_data = {
+    1: (".nl", "6897290"), 2: (".info", "4927230"), 3: (".xyz", "3605402"),
+    4: (".in", "13264020"), 5: (".at", "12130549"), 6: (".online", "3557169"),
+    7: (".me", "10699054"), 8: (".vip", "16929713"), 9: (".live", "4039497"),
+    10: (".trade", "6692301"), 11: (".cc", "9960073"), 12: (".ir", "450000"),
+    13: (".mobi", "7114338"), 14: (".express", "13505184"), 15: (".io", "46725525"),
+    16: (".icu", "4482844"), 17: (".work", "10418285"), 18: (".zone", "13505184"),
+    19: (".site", "2351349"), 20: (".life", "3014550"), 21: (".space", "2351349"),
+    22: (".club", "16929713"), 23: (".ltd", "8983359"), 24: (".link", "9067766"),
+    25: (".works", "9887724"), 26: (".pro", "4721929"), 27: (".asia", "14325142"),
+    28: (".app", "19244887"), 29: (".rocks", "5064444"), 30: (".tech", "4762989"),
+    31: (".plus", "13505184"), 32: (".cloud", "18666094"), 33: (".biz", "20836570"),
+    34: (".dev", "16495618"), 35: (".observer", "11394999"),
+    37: (".direct", "18027009"), 38: (".store", "3557169"), 39: (".solutions", "9887724"),
+    40: (".shop", "2399582"), 47: (".website", "2351349"), 48: (".today", "4039497"),
+    49: (".name", "8296042"), 50: (".guru", "4039497"), 51: (".show", "16218279"),
+    52: (".london", "36488113"), 53: (".design", "50933837"), 55: (".center", "10792089"),
+    56: (".news", "13505184"), 57: (".tel", "11202068"), 58: (".win", "6692301"),
+    59: (".email", "6089391"), 60: (".company", "8139285"), 61: (".systems", "24357564"),
+    62: (".li", "8513089"), 63: (".host", "97671420"), 64: (".one", "17303517"),
+    65: (".loan", "6692301"), 66: (".business", "4039497"), 67: (".world", "3014550"),
+    68: (".click", "2399582"), 70: (".ink", "26045712"), 71: (".market", "40768774"),
+    72: (".tv", "31110156"), 73: (".bid", "6692301"), 74: (".stream", "6692301"),
+    76: (".men", "6692301"), 77: (".pw", "7174629"), 78: (".photography", "13505184"),
+    79: (".exchange", "13505184"), 81: (".ph", "54985392"), 82: (".buzz", "33642378"),
+    83: (".international", "13505184"), 84: (".media", "8139285"),
+    86: (".berlin", "55720942"), 87: (".jobs", "198960300"), 90: (".group", "9887724"),
+    91: (".global", "36114309"), 92: (".art", "3574321"), 93: (".blog", "4762989"),
+    94: (".studio", "19835739"), 95: (".ooo", "27480638"), 97: (".digital", "3014550"),
+    98: (".services", "10792089"), 99: (".expert", "10792089"), 100: (".tools", "16218279"),
+    101: (".agency", "8139285"),
+    102: (".network", "8139285")
+}
+temp_extensions = {}
+seen_tlds = set()
+for key, (tld, price_val) in domain_extensions_data.items():
+    if tld not in seen_tlds:
+        temp_extensions[key] = (tld, price_val)
+        seen_tlds.add(tld)
+domain_extensions = temp_extensions
+
+
+# --- توابع کاربردی ---
+def price_to_number(price: str) -> float:
+    price_clean = price.replace(",", "").strip()
+    try:
+        return float(price_clean)
+    except ValueError:
+        return float('inf')
+
+
+# قیمت عددی و ترتیب‌های مرتب‌شده بر اساس قیمت یک بار هنگام import محاسبه می‌شوند
+extension_prices = {key: price_to_number(price_val)
+                    for key, (_, price_val) in domain_extensions.items()}
+_extensions_by_price = {
+    descending: {key: domain_extensions[key]
+                 for key in sorted(domain_extensions, key=extension_prices.__getitem__,
+                                   reverse=descending)}
+    for descending in (False, True)
+}
+
+
+# قیمت هر پسوند بر اساس خود پسوند (مثلاً ".io")
+tld_prices = {tld: price_val for tld, price_val in domain_extensions.values()}
+
+
+def extensions_sorted_by_price(descending: bool = False) -> Dict[int, Tuple[str, str]]:
+    """``domain_extensions`` ordered by price (precomputed; do not mutate)."""
+    return _extensions_by_price[descending]
+
+
+def extensions_under_price(max_price: float) -> List[int]:
+    return [key for key, price in extension_prices.items() if price <= max_price]
+
+
+# --- تولید کلمات تصادفی ---
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+VOWELS = "aeiou"
+CONSONANTS = "".join(c for c in LETTERS if c not in VOWELS)
+PATTERN_ALPHABETS = {"C": CONSONANTS, "V": VOWELS, "*": LETTERS}
+# زیر این اندازه کل فضا شمارش می‌شود؛ بالاتر از آن نمونه‌برداری دسته‌ای انجام می‌شود
+ENUMERATE_SPACE_LIMIT = 200_000
+SAMPLE_BATCH_SIZE = 4096
+
+
+def alternating_pattern(length: int) -> str:
+    return ("CV" * length)[:length]
+
+
+def _pattern_alphabets(length: int, pattern: Optional[str]) -> List[str]:
+    pattern = pattern or "*" * length
+    if len(pattern) != length or any(c not in PATTERN_ALPHABETS for c in pattern.upper()):
+        raise ValueError(
+            f"pattern {pattern!r} must be {length} characters of C, V or *")
+    return [PATTERN_ALPHABETS[c] for c in pattern.upper()]
+
+
+def index_to_word(index: int, alphabets: List[str]) -> str:
+    """Map an integer in [0, prod(len(a))) to a word, one mixed-radix digit per position."""
+    chars = []
+    for alphabet in reversed(alphabets):
+        index, digit = divmod(index, len(alphabet))
+        chars.append(alphabet[digit])
+    return "".join(reversed(chars))
+
+
+def generate_random_words(count: int, length: int,
+                          on_progress: Optional[Callable[[int, int], None]] = None,
+                          exclude: Optional[Container[str]] = None,
+                          pattern: Optional[str] = None) -> List[str]:
+    """Return exactly ``count`` unique random words, or every eligible word if fewer exist.
+
+    Words are drawn as distinct indexes into the space of all ``length``-letter
+    words matching ``pattern`` (``C`` consonant, ``V`` vowel, ``*`` any), so no
+    draw is wasted on duplicates. Words in ``exclude`` are skipped.
+    ``on_progress(found, count)`` is called once per batch.
+    """
+    if count <= 0:
+        return []
+    alphabets = _pattern_alphabets(length, pattern)
+    exclude = exclude if exclude is not None else ()
+    space = 1
+    for alphabet in alphabets:
+        space *= len(alphabet)
+
+    if space <= ENUMERATE_SPACE_LIMIT:
+        candidates = [word for word in (index_to_word(i, alphabets) for i in range(space))
+                      if word not in exclude]
+        words = random.sample(candidates, min(count, len(candidates)))
+        if on_progress is not None:
+            on_progress(len(words), count)
+        return words
+
+    words: List[str] = []
+    drawn = set()
+    while len(words) < count and len(drawn) < space:
+        batch = min(SAMPLE_BATCH_SIZE, space - len(drawn))
+        for index in random.sample(range(space), batch):
+            if index in drawn:
+                continue
+            drawn.add(index)
+            word = index_to_word(index, alphabets)
+            if word not in exclude:
+                words.append(word)
+                if len(words) == count:
+                    break
+        if on_progress is not None:
+            on_progress(len(words), count)
+    return words
+
+
+# --- اندازه‌گیری زمان مراحل هر بررسی ---
+LOOKUP_PHASES = ("cache", "dns", "rate_limit", "referral",
+                 "connect", "response", "parse")
+_current_lookup = threading.local()
+
+
+class LookupMetrics:
+    """Phase timings and outcome of a single domain check."""
+
+    def __init__(self, domain: str):
+        self.domain = domain
+        self.phases: Dict[str, float] = {}
+        self.status: Optional[str] = None
+        self.error_class: Optional[str] = None
+        self.cache_hit: Optional[bool] = None
+        self.retries = 0
+        self.total = 0.0
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def lookup_phase(phase: str) -> Iterator[None]:
+    """Charge the enclosed time to ``phase`` of the lookup running on this thread, if any."""
+    current = getattr(_current_lookup, "metrics", None)
+    if current is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.add(phase, time.perf_counter() - started)
+
+
+def classify_error(status: str) -> Optional[str]:
+    """Normalize an error status into a short class name; None for successful checks."""
+    if not status.startswith("Error"):
+        return None
+    message = status.lower()
+    if "timed out" in message:
+        return "timeout"
+    if "rate limit" in message or "limit exceeded" in message or \
+            "too many" in message or "quota" in message:
+        return "rate_limited"
+    if "no output" in message:
+        return "empty_response"
+    if "refused" in message or "reset" in message or "unreachable" in message or \
+            "failed to connect" in message or "name or service not known" in message:
+        return "connection"
+    if status.startswith(TRANSIENT_ERROR_PREFIX):
+        return "transient"
+    if status.startswith("Error: WHOIS Lookup"):
+        return "whois_lookup"
+    return "general"
+
+
+# مرزهای بالای سطل‌های هیستوگرام زمان (ثانیه)؛ حافظه و هزینه خروجی مستقل از تعداد بررسی‌ها است
+PHASE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+
+
+class _Histogram:
+    """Fixed-bucket latency histogram with a running count and sum (not thread-safe)."""
+
+    def __init__(self):
+        self.buckets = [0] * len(PHASE_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.buckets[bisect.bisect_left(PHASE_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def copy(self) -> "_Histogram":
+        histogram = _Histogram()
+        histogram.buckets = list(self.buckets)
+        histogram.count = self.count
+        histogram.sum = self.sum
+        return histogram
+
+    def quantile(self, q: float) -> float:
+        """Estimate like Prometheus' histogram_quantile: linear within the bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, in_bucket in enumerate(self.buckets):
+            if in_bucket and seen + in_bucket >= rank:
+                lower = PHASE_BUCKETS[index - 1] if index else 0.0
+                upper = PHASE_BUCKETS[index]
+                if upper == float("inf"):
+                    return lower
+                return lower + (upper - lower) * (rank - seen) / in_bucket
+            seen += in_bucket
+        return 0.0
+
+
+class MetricsRecorder:
+    """Thread-safe collector of LookupMetrics with summaries and Prometheus export."""
+
+    def __init__(self):
+        self.lookups = 0
+        self.status_counts: Dict[str, int] = {}
+        self.error_counts: Dict[str, int] = {}
+        self.phase_histograms: Dict[str, _Histogram] = {
+            phase: _Histogram() for phase in LOOKUP_PHASES}
+        self.total_histogram = _Histogram()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def record(self, metrics: LookupMetrics):
+        with self._lock:
+            self.lookups += 1
+            self.retries += metrics.retries
+            if metrics.cache_hit is not None:
+                self.cache_hits += metrics.cache_hit
+                self.cache_misses += not metrics.cache_hit
+            kind = _status_kind(metrics.status or "Error")
+            self.status_counts[kind] = self.status_counts.get(kind, 0) + 1
+            if metrics.error_class is not None:
+                self.error_counts[metrics.error_class] = \
+                    self.error_counts.get(metrics.error_class, 0) + 1
+            for phase, seconds in metrics.phases.items():
+                self.phase_histograms.setdefault(phase, _Histogram()).observe(seconds)
+            self.total_histogram.observe(metrics.total)
+
+    def _histograms(self) -> Dict[str, _Histogram]:
+        with self._lock:
+            histograms = {phase: histogram.copy()
+                          for phase, histogram in self.phase_histograms.items()}
+            histograms["total"] = self.total_histogram.copy()
+        return histograms
+
+    def phase_summary(self) -> List[Dict[str, Any]]:
+        """One row per phase: count, total seconds, mean and estimated p50/p95 milliseconds."""
+        return [{
+            "phase": phase,
+            "count": histogram.count,
+            "total_s": histogram.sum,
+            "mean_ms": 1000 * histogram.sum / histogram.count if histogram.count else 0.0,
+            "p50_ms": 1000 * histogram.quantile(0.5),
+            "p95_ms": 1000 * histogram.quantile(0.95),
+        } for phase, histogram in self._histograms().items()]
+
+    def to_prometheus(self, prefix: str = "domain_checker") -> str:
+        lines = [
+            f"# HELP {prefix}_lookups_total Domain checks by outcome.",
+            f"# TYPE {prefix}_lookups_total counter",
+        ]
+        with self._lock:
+            status_counts = dict(self.status_counts)
+            error_counts = dict(self.error_counts)
+        for status, count in sorted(status_counts.items()):
+            lines.append(f'{prefix}_lookups_total{{status="{status}"}} {count}')
+        lines += [
+            f"# HELP {prefix}_errors_total Failed checks by normalized error class.",
+            f"# TYPE {prefix}_errors_total counter",
+        ]
+        for error_class, count in sorted(error_counts.items()):
+            lines.append(
+                f'{prefix}_errors_total{{error_class="{error_class}"}} {count}')
+        lines += [
+            f"# HELP {prefix}_phase_seconds Time spent per lookup phase.",
+            f"# TYPE {prefix}_phase_seconds histogram",
+        ]
+        for phase, histogram in self._histograms().items():
+            cumulative = 0
+            for bound, in_bucket in zip(PHASE_BUCKETS, histogram.buckets):
+                cumulative += in_bucket
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(
+                    f'{prefix}_phase_seconds_bucket{{phase="{phase}",le="{le}"}} {cumulative}')
+            lines.append(
+                f'{prefix}_phase_seconds_sum{{phase="{phase}"}} {histogram.sum:.6f}')
+            lines.append(
+                f'{prefix}_phase_seconds_count{{phase="{phase}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+# --- کش نتایج WHOIS ---
+WHOIS_CACHE_FILE = "whois_cache.sqlite3"
+WHOIS_CACHED_FIELDS = ("registrar", "creation_date",
+                       "expiration_date", "name_servers", "status")
+# مدت اعتبار هر نوع نتیجه در کش (ثانیه)
+CACHE_TTL_SECONDS = {
+    "Registered": 7 * 24 * 3600,
+    "Available": 24 * 3600,
+    "Error": 15 * 60,
+}
+
+
+def _status_kind(status: str) -> str:
+    return "Error" if status.startswith("Error") else status
+
+
+_ISO_DATE_RE = re.compile(r"(\d{4})[-./](\d{1,2})[-./](\d{1,2})")
+_REPR_DATE_RE = re.compile(r"datetime\.datetime\((\d{4}), (\d{1,2}), (\d{1,2})")
+_DMY_DATE_RE = re.compile(r"(\d{1,2})[- ]([A-Za-z]{3})[- ](\d{4})")
+
+
+def parse_expiration_date(value: Any) -> Optional[float]:
+    """Best-effort epoch seconds (UTC midnight) of a WHOIS/RDAP expiry value, or None.
+
+    Handles ISO dates, python-whois ``str(datetime)``/``str([datetime, ...])``
+    output and ``14-Mar-2030`` style dates; only the day matters here.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value)
+    match = _ISO_DATE_RE.search(text) or _REPR_DATE_RE.search(text)
+    try:
+        if match:
+            date = datetime.date(*map(int, match.groups()))
+        else:
+            match = _DMY_DATE_RE.search(text)
+            if not match:
+                return None
+            date = datetime.datetime.strptime(" ".join(match.groups()), "%d %b %Y").date()
+    except ValueError:
+        return None
+    return datetime.datetime(date.year, date.month, date.day,
+                             tzinfo=datetime.timezone.utc).timestamp()
+
+
+class WhoisCache:
+    """SQLite-backed cache of WHOIS results with a separate TTL per status kind.
+
+    Next to the expiring cache, every live check (also with the cache turned
+    off) is appended to the ``whois_history`` table (domain, status, expiry
+    date, check time), which never expires and feeds the drop-watch re-checker.
+    """
+
+    def __init__(self, path: str = WHOIS_CACHE_FILE,
+                 ttls: Optional[Dict[str, int]] = None):
+        self.path = path
+        self.ttls = dict(CACHE_TTL_SECONDS if ttls is None else ttls)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS whois_cache ("
+                "domain TEXT PRIMARY KEY, status TEXT NOT NULL, "
+                "fields TEXT, checked_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS whois_history ("
+                "domain TEXT NOT NULL, status TEXT NOT NULL, "
+                "expiration_date REAL, checked_at REAL NOT NULL, "
+                "UNIQUE (domain, checked_at))"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS whois_history_expiration "
+                "ON whois_history (expiration_date)")
+
+    def get(self, domain: str) -> Optional[str]:
+        key = domain.lower()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, checked_at FROM whois_cache WHERE domain = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                status, checked_at = row
+                ttl = self.ttls.get(_status_kind(status), 0)
+                if time.time() - checked_at < ttl:
+                    self.hits += 1
+                    return status
+                # نتیجه منقضی شده؛ حذف تا دوباره بررسی شود
+                with self._conn:
+                    self._conn.execute(
+                        "DELETE FROM whois_cache WHERE domain = ?", (key,))
+            self.misses += 1
+            return None
+
+    def set(self, domain: str, status: str, fields: Optional[Dict[str, Any]] = None,
+            history: bool = True):
+        fields = fields or {}
+        checked_at = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO whois_cache (domain, status, fields, checked_at) "
+                "VALUES (?, ?, ?, ?)",
+                (domain.lower(), status, json.dumps(fields, ensure_ascii=False),
+                 checked_at)
+            )
+            if history:
+                self._add_history(domain, status,
+                                  parse_expiration_date(fields.get("expiration_date")),
+                                  checked_at)
+
+    def _add_history(self, domain: str, status: str, expiration_date: Optional[float],
+                     checked_at: float) -> bool:
+        return self._conn.execute(
+            "INSERT OR IGNORE INTO whois_history (domain, status, expiration_date, checked_at) "
+            "VALUES (?, ?, ?, ?)",
+            (domain.lower(), status, expiration_date, checked_at)
+        ).rowcount > 0
+
+    def add_history(self, domain: str, status: str, checked_at: float,
+                    expiration_date: Optional[float] = None) -> bool:
+        """Record a check made elsewhere (e.g. an old results file); False if already recorded."""
+        with self._lock, self._conn:
+            return self._add_history(domain, status, expiration_date, checked_at)
+
+    def history(self, domain: str) -> List[Dict[str, Any]]:
+        """Every recorded check of ``domain``, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, expiration_date, checked_at FROM whois_history "
+                "WHERE domain = ? ORDER BY checked_at", (domain.lower(),)
+            ).fetchall()
+        return [{"domain": domain.lower(), "status": status, "expiration_date": expiration_date,
+                 "checked_at": checked_at} for status, expiration_date, checked_at in rows]
+
+    def latest_checks(self, checked_before: Optional[float] = None) -> List[Dict[str, Any]]:
+        """The most recent check of each domain, optionally only those older than ``checked_before``.
+
+        The expiry date is the latest one seen for the domain, so an
+        "Available" answer does not hide when a name was due to drop.
+        """
+        with self._lock:
+            # ستون‌های غیرتجمیعی همراه MAX در SQLite از همان ردیف آخرین بررسی می‌آیند
+            rows = self._conn.execute(
+                "SELECT domain, status, MAX(checked_at), "
+                "(SELECT MAX(expiration_date) FROM whois_history AS h "
+                " WHERE h.domain = whois_history.domain) "
+                "FROM whois_history GROUP BY domain HAVING MAX(checked_at) < ?",
+                (float("inf") if checked_before is None else checked_before,)
+            ).fetchall()
+        return [{"domain": domain, "status": status, "checked_at": checked_at,
+                 "expiration_date": expiration_date}
+                for domain, status, checked_at, expiration_date in rows]
+
+    def invalidate(self, domains: Iterable[str]):
+        """Drop cached results so the next lookup of these domains goes to WHOIS."""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM whois_cache WHERE domain = ?",
+                                   [(domain.lower(),) for domain in domains])
+
+    def known_labels(self) -> Set[str]:
+        """Second-level labels (the word part) of every cached domain."""
+        with self._lock:
+            rows = self._conn.execute("SELECT domain FROM whois_cache").fetchall()
+        return {domain.split(".", 1)[0] for (domain,) in rows}
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+_whois_cache: Optional[WhoisCache] = None
+_whois_cache_lock = threading.Lock()
+
+
+def get_whois_cache() -> WhoisCache:
+    global _whois_cache
+    with _whois_cache_lock:
+        if _whois_cache is None:
+            _whois_cache = WhoisCache()
+    return _whois_cache
+
+
+# --- محدودکننده نرخ برای هر سرور WHOIS ---
+# خطاهای گذرا (قطعی شبکه یا محدودیت نرخ) که نباید به «Available» تبدیل شوند
+TRANSIENT_ERROR_PATTERNS = [
+    "timed out", "failed to connect", "network is unreachable",
+    "connection reset", "connection refused", "temporarily unavailable",
+    "rate limit", "limit exceeded", "too many", "quota exceeded", "try again later",
+    # پاسخ خالی یعنی سرور اتصال را بدون جواب بسته است
+    "returned no output",
+]
+# سرورهای WHOIS مشترک بین چند پسوند؛ بقیه پسوندها سرور اختصاصی دارند
+WHOIS_SERVERS = {
+    ".app": "whois.nic.google", ".dev": "whois.nic.google",
+    ".com": "whois.verisign-grs.com", ".net": "whois.verisign-grs.com",
+    ".name": "whois.verisign-grs.com", ".cc": "ccwhois.verisign-grs.com",
+    ".tv": "tvwhois.verisign-grs.com",
+    ".io": "whois.nic.io", ".ir": "whois.nic.ir", ".me": "whois.nic.me",
+    ".nl": "whois.domain-registry.nl", ".at": "whois.nic.at",
+    ".in": "whois.registry.in", ".li": "whois.nic.li",
+}
+# «raw»: کلاینت سبک داخلی (RDAP یا WHOIS خام)؛ «python-whois»: مسیر قدیمی
+WHOIS_BACKENDS = ("raw", "python-whois")
+DEFAULT_WHOIS_BACKEND = "raw"
+DEFAULT_SERVER_RATE = 2.0  # پرس‌وجو در ثانیه برای هر سرور
+DEFAULT_SERVER_BURST = 4
+DEFAULT_MAX_RETRIES = 4
+
+
+def _is_transient_error(message: str) -> bool:
+    message = message.lower()
+    return any(pattern in message for pattern in TRANSIENT_ERROR_PATTERNS)
+
+
+def whois_server_for(domain: str) -> str:
+    tld = "." + domain.rsplit(".", 1)[-1].lower()
+    return WHOIS_SERVERS.get(tld, f"whois.nic{tld}")
+
+
+class AdaptiveRateLimiter:
+    """Token bucket whose refill rate halves on throttling and recovers additively on success."""
+
+    def __init__(self, rate: float = DEFAULT_SERVER_RATE,
+                 burst: int = DEFAULT_SERVER_BURST, min_rate: float = 0.1):
+        self.base_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * 0.1)
+
+    def on_throttle(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            # توکن‌های ذخیره را هم دور بریز تا فشار بلافاصله کم شود
+            self._tokens = min(self._tokens, 0.0)
+
+
+class WhoisScheduler:
+    """Routes lookups through a per-WHOIS-server rate limiter and retries transient failures with jittered backoff."""
+
+    def __init__(self, rate: float = DEFAULT_SERVER_RATE,
+                 burst: int = DEFAULT_SERVER_BURST,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 base_delay: float = 1.0, max_delay: float = 30.0,
+                 backend: str = DEFAULT_WHOIS_BACKEND,
+                 client: Optional[WhoisClient] = None):
+        if backend not in WHOIS_BACKENDS:
+            raise ValueError(f"unknown WHOIS backend {backend!r}")
+        self.backend = backend
+        self.client = client if client is not None or backend != "raw" else get_whois_client()
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self._limiters: Dict[str, AdaptiveRateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter_for(self, server: str) -> AdaptiveRateLimiter:
+        with self._lock:
+            if server not in self._limiters:
+                self._limiters[server] = AdaptiveRateLimiter(
+                    self.rate, self.burst)
+            return self._limiters[server]
+
+    def server_for(self, domain: str) -> str:
+        """Registry endpoint answering for ``domain``; lookups are rate-limited per endpoint."""
+        if self.client is not None:
+            return self.client.endpoint_for(domain)
+        return whois_server_for(domain)
+
+    def _query(self, domain: str) -> Tuple[str, Dict[str, Any]]:
+        if self.client is not None:
+            return self.client.lookup(domain)
+        return _lookup_whois(domain)
+
+    def lookup(self, domain: str) -> Tuple[str, Dict[str, Any]]:
+        limiter = self.limiter_for(self.server_for(domain))
+        for attempt in range(self.max_retries + 1):
+            with lookup_phase("rate_limit"):
+                limiter.acquire()
+            status, fields = self._query(domain)
+            if not status.startswith(TRANSIENT_ERROR_PREFIX):
+                limiter.on_success()
+                return status, fields
+            limiter.on_throttle()
+            if attempt < self.max_retries:
+                with self._lock:
+                    self.retries += 1
+                # زمان‌بند ممکن است بین چند کار مشترک باشد؛ تلاش مجدد به حساب همین بررسی هم نوشته می‌شود
+                current = getattr(_current_lookup, "metrics", None)
+                if current is not None:
+                    current.retries += 1
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                with lookup_phase("rate_limit"):
+                    time.sleep(delay * random.uniform(0.5, 1.5))
+        return status, fields
+
+
+def interleave_by_server(domains: List[str],
+                         server_for: Callable[[str], str] = whois_server_for) -> List[int]:
+    """Return indexes of domains ordered round-robin across their WHOIS servers."""
+    queues: Dict[str, List[int]] = {}
+    servers_by_tld: Dict[str, str] = {}
+    for idx, domain in enumerate(domains):
+        tld = domain.rsplit(".", 1)[-1].lower()
+        if tld not in servers_by_tld:
+            servers_by_tld[tld] = server_for(domain)
+        queues.setdefault(servers_by_tld[tld], []).append(idx)
+    order: List[int] = []
+    pending = [list(reversed(q)) for q in queues.values()]
+    while pending:
+        for queue in pending:
+            order.append(queue.pop())
+        pending = [q for q in pending if q]
+    return order
+
+
+_whois_client: Optional[WhoisClient] = None
+_whois_client_lock = threading.Lock()
+
+
+def get_whois_client() -> WhoisClient:
+    global _whois_client
+    with _whois_client_lock:
+        if _whois_client is None:
+            _whois_client = WhoisClient(
+                server_seeds=WHOIS_SERVERS, phase=lookup_phase)
+    return _whois_client
+
+
+_whois_scheduler: Optional[WhoisScheduler] = None
+_whois_scheduler_lock = threading.Lock()
+
+
+def get_whois_scheduler() -> WhoisScheduler:
+    global _whois_scheduler
+    with _whois_scheduler_lock:
+        if _whois_scheduler is None:
+            _whois_scheduler = WhoisScheduler()
+    return _whois_scheduler
+
+
+# --- پیش‌فیلتر سریع DNS ---
+class DnsPrefilter:
+    """Marks domains with delegated nameservers as Registered without a WHOIS query.
+
+    NXDOMAIN, empty and failed answers are left for WHOIS to decide. Pass
+    ``nameservers``/``port`` to point the resolver at a local stub.
+    """
+
+    def __init__(self, nameservers: Optional[List[str]] = None, port: int = 53,
+                 timeout: float = 3.0):
+        if dns is None:
+            raise RuntimeError(
+                "dnspython is not installed; install it to use the DNS pre-filter.")
+        self._resolver = dns.resolver.Resolver(configure=nameservers is None)
+        if nameservers is not None:
+            self._resolver.nameservers = nameservers
+        self._resolver.port = port
+        self._resolver.lifetime = timeout
+        self.whois_saved = 0
+        self.passed_through = 0
+        self._lock = threading.Lock()
+
+    def nameservers_for(self, domain: str) -> List[str]:
+        try:
+            answer = self._resolver.resolve(domain, "NS")
+        except dns.exception.DNSException:
+            # NXDOMAIN، پاسخ خالی یا خطای شبکه؛ تصمیم با WHOIS است
+            return []
+        return sorted(str(rdata.target).rstrip(".").lower() for rdata in answer)
+
+    def check(self, domain: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Return ("Registered", fields) for delegated names, otherwise None."""
+        nameservers = self.nameservers_for(domain)
+        with self._lock:
+            if nameservers:
+                self.whois_saved += 1
+            else:
+                self.passed_through += 1
+        if nameservers:
+            return "Registered", {"name_servers": str(nameservers), "source": "dns"}
+        return None
+
+
+class _TimedSocket:
+    """Socket proxy charging connect and receive time to lookup phases."""
+
+    def __init__(self, sock: Any, connect_phase: str, response_phase: str):
+        self._sock = sock
+        self._connect_phase = connect_phase
+        self._response_phase = response_phase
+
+    def connect(self, address):
+        with lookup_phase(self._connect_phase):
+            return self._sock.connect(address)
+
+    def recv(self, bufsize: int) -> bytes:
+        with lookup_phase(self._response_phase):
+            return self._sock.recv(bufsize)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._sock, name)
+
+
+class _TimedNICClient(NICClient):
+    """NICClient whose sockets report connect/response time; the IANA hop counts as referral."""
+
+    def __init__(self):
+        super().__init__()
+        self._socket_phases = ("connect", "response")
+
+    def get_socket(self):
+        return _TimedSocket(NICClient.get_socket(), *self._socket_phases)
+
+    def findwhois_iana(self, tld: str) -> Optional[str]:
+        self._socket_phases = ("referral", "referral")
+        try:
+            return super().findwhois_iana(tld)
+        finally:
+            self._socket_phases = ("connect", "response")
+
+
+def _query_whois(domain: str) -> Any:
+    """Equivalent of whois.whois() for a bare domain, with network and parse timed separately."""
+    domain = domain.encode("idna").decode("utf-8")
+    # خطاهای سوکت را به‌صورت استثنا بگیر تا به «Available» تبدیل نشوند
+    text = _TimedNICClient().whois_lookup(
+        None, domain, 0, quiet=True, ignore_socket_errors=False)
+    if not text:
+        raise PywhoisError("Whois command returned no output")
+    with lookup_phase("parse"):
+        return WhoisEntry.load(domain, text)
+
+
+def _extract_whois_fields(w: Any) -> Dict[str, Any]:
+    return {
+        field: str(getattr(w, field)) if getattr(w, field, None) is not None else None
+        for field in WHOIS_CACHED_FIELDS
+    }
+
+
+def _lookup_whois(domain: str) -> Tuple[str, Dict[str, Any]]:
+    """The python-whois backend: full parse, then reduced to Available/Registered."""
+    fields: Dict[str, Any] = {}
+    try:
+        w = _query_whois(domain)
+        if w is None or not hasattr(w, 'status'):
+            return "Available", fields
+        # متن محدودیت نرخ فقط وقتی معتبر است که رکوردی تجزیه نشده باشد؛
+        # پانویس حقوقی رکوردهای ثبت‌شده هم ممکن است «rate limited» داشته باشد
+        has_record = any(getattr(w, field, None) for field in
+                         ("domain_name", "registrar", "creation_date", "expiration_date")) or \
+            bool(REGISTERED_PATTERN.search(str(getattr(w, 'text', '')).lower().encode("utf-8")))
+        if not has_record and _is_transient_error(str(getattr(w, 'text', ''))):
+            return f"{TRANSIENT_ERROR_PREFIX} (rate limited by WHOIS server)", fields
+        fields = _extract_whois_fields(w)
+        if w.status is None or \
+           (isinstance(w.status, list) and any("available" in str(s).lower() for s in w.status)) or \
+           (isinstance(w.status, str) and "available" in w.status.lower()) or \
+           (hasattr(w, 'text') and ("no match" in str(w.text).lower() or "not found" in str(w.text).lower())) or \
+           (hasattr(w, 'registrar') and w.registrar is None and w.creation_date is None) or \
+           w.expiration_date is None or \
+           (isinstance(w.expiration_date, list) and not w.expiration_date):
+            return "Available", fields
+        else:
+            return "Registered", fields
+    except PywhoisError as e:
+        if _is_transient_error(str(e)):
+            return f"{TRANSIENT_ERROR_PREFIX} ({str(e)})", fields
+        if "no match for" in str(e).lower() or "no entries found" in str(e).lower():
+            return "Available", fields
+        return f"Error: WHOIS Lookup ({str(e)})", fields
+    except Exception as e:
+        if _is_transient_error(str(e)):
+            return f"{TRANSIENT_ERROR_PREFIX} ({str(e)})", fields
+        common_errors = ["no whois server", "no match", "not found"]
+        if any(err_msg in str(e).lower() for err_msg in common_errors):
+            return "Available", fields
+        return f"Error: General ({str(e)})", fields
+
+
+def check_domain_availability(domain: str, use_cache: bool = True,
+                              scheduler: Optional[WhoisScheduler] = None,
+                              prefilter: Optional[DnsPrefilter] = None,
+                              metrics: Optional[MetricsRecorder] = None) -> str:
+    if metrics is None:
+        return _check_domain_availability(domain, use_cache, scheduler, prefilter)
+    lookup = LookupMetrics(domain)
+    _current_lookup.metrics = lookup
+    started = time.perf_counter()
+    try:
+        lookup.status = _check_domain_availability(
+            domain, use_cache, scheduler, prefilter)
+    finally:
+        _current_lookup.metrics = None
+        lookup.total = time.perf_counter() - started
+        lookup.error_class = classify_error(lookup.status or "Error")
+        metrics.record(lookup)
+    return lookup.status
+
+
+# هر بررسی زنده (با یا بدون کش) در تاریخچه ثبت می‌شود؛ بنچمارک‌ها با سرور جعلی آن را خاموش می‌کنند
+RECORD_HISTORY = True
+
+
+def _check_domain_availability(domain: str, use_cache: bool,
+                               scheduler: Optional[WhoisScheduler],
+                               prefilter: Optional[DnsPrefilter]) -> str:
+    cache = get_whois_cache() if use_cache else None
+    if cache is not None:
+        with lookup_phase("cache"):
+            cached_status = cache.get(domain)
+        current = getattr(_current_lookup, "metrics", None)
+        if current is not None:
+            current.cache_hit = cached_status is not None
+        if cached_status is not None:
+            return cached_status
+    result = None
+    if prefilter is not None:
+        with lookup_phase("dns"):
+            result = prefilter.check(domain)
+    if result is None:
+        result = (scheduler or get_whois_scheduler()).lookup(domain)
+    status, fields = result
+    # خطای گذرا کش نمی‌شود تا بررسی بعدی (یا ادامه یک اجرا) دوباره از WHOIS بپرسد
+    if cache is not None and not status.startswith(TRANSIENT_ERROR_PREFIX):
+        with lookup_phase("cache"):
+            cache.set(domain, status, fields, history=RECORD_HISTORY)
+    elif RECORD_HISTORY:
+        # تاریخچه مستقل از استفاده از کش ثبت می‌شود
+        with lookup_phase("cache"):
+            get_whois_cache().add_history(
+                domain, status, time.time(),
+                parse_expiration_date((fields or {}).get("expiration_date")))
+    return status
+
+
+# تعداد پیش‌فرض کارگرهای هم‌زمان برای پرس‌وجوی WHOIS
+DEFAULT_MAX_WORKERS = 8
+# کلمات در دسته‌هایی با این اندازه بررسی می‌شوند تا فایل‌های بسیار بزرگ کامل در حافظه نمانند
+CHECK_BATCH_WORDS = 2000
+
+
+def check_domains_concurrently(domains: List[str],
+                               max_workers: int = DEFAULT_MAX_WORKERS,
+                               use_cache: bool = True,
+                               scheduler: Optional[WhoisScheduler] = None,
+                               prefilter: Optional[DnsPrefilter] = None,
+                               metrics: Optional[MetricsRecorder] = None,
+                               cancel_event: Optional[threading.Event] = None) -> Iterator[Tuple[int, str, str]]:
+    """Check domains on a bounded thread pool, yielding (index, domain, status) as each finishes.
+
+    Setting ``cancel_event`` (or closing the generator) drops every lookup that
+    has not started yet; lookups already in flight are allowed to finish.
+    """
+    if not domains:
+        return
+    scheduler = scheduler or get_whois_scheduler()
+    max_workers = max(1, min(max_workers, len(domains)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(check_domain_availability, domains[idx], use_cache,
+                            scheduler, prefilter, metrics): idx
+            for idx in interleave_by_server(domains, scheduler.server_for)
+        }
+        try:
+            for future in as_completed(futures):
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                idx = futures[future]
+                yield idx, domains[idx], future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def normalize_tld(tld: str) -> str:
+    tld = tld.strip().lower()
+    return tld if tld.startswith(".") else "." + tld
+
+
+# --- ذخیره‌سازی جریانی و قابل ازسرگیری نتایج ---
+# فقط این وضعیت‌ها نتیجه قطعی‌اند؛ خطاها هنگام ادامه اجرا دوباره بررسی می‌شوند
+SETTLED_STATUSES = ("Available", "Registered")
+
+
+class ResultStore:
+    """Append-only JSONL store of check results, written as each check completes.
+
+    An in-memory index keeps the latest record per domain for deduplication;
+    a result whose status matches that latest record is only indexed, not
+    written again, so re-running a list does not grow the file. Each record
+    carries a ``run_id``; a run is closed by a ``run_complete`` marker line,
+    so re-opening the store after a crash can skip every domain the unfinished
+    run already checked (unchanged results of a re-run are checked again).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._open_runs: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        needs_newline = self._load()
+        self._file = open(path, "a", encoding="utf-8")
+        if needs_newline:
+            # خط نیمه‌کاره از اجرای قطع‌شده را ببند تا رکورد بعدی سالم بماند
+            self._file.write("\n")
+            self._file.flush()
+
+    def _load(self) -> bool:
+        last_line = ""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for last_line in f:
+                    try:
+                        record = json.loads(last_line)
+                    except json.JSONDecodeError:
+                        continue
+                    self._index(record)
+        except FileNotFoundError:
+            return False
+        return bool(last_line) and not last_line.endswith("\n")
+
+    def _index(self, record: Dict[str, Any]):
+        run_id = record.get("run_id")
+        if record.get("event") == "run_complete":
+            self._open_runs.pop(run_id, None)
+            return
+        self._latest[record["domain"].lower()] = record
+        if run_id is not None:
+            self._open_runs.setdefault(run_id, {})[
+                record["domain"].lower()] = record
+
+    def _write(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def append(self, record: Dict[str, Any]):
+        with self._lock:
+            latest = self._latest.get(record["domain"].lower())
+            if latest is None or latest.get("status") != record.get("status"):
+                self._write(record)
+            self._index(record)
+
+    def mark_run_complete(self, run_id: str):
+        with self._lock:
+            marker = {"event": "run_complete", "run_id": run_id,
+                      "completed_at": datetime.datetime.now().isoformat()}
+            self._write(marker)
+            self._index(marker)
+
+    def completed_in_run(self, run_id: str) -> Dict[str, Dict[str, Any]]:
+        """Domains an unfinished run already settled, keyed by lowercase domain.
+
+        Only Available/Registered results count; errors (e.g. throttling
+        during a crash) are left out so a resumed run checks them again.
+        """
+        with self._lock:
+            return {domain: record
+                    for domain, record in self._open_runs.get(run_id, {}).items()
+                    if record.get("status") in SETTLED_STATUSES}
+
+    def latest(self, domain: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._latest.get(domain.lower())
+
+    def __contains__(self, domain: str) -> bool:
+        return self.latest(domain) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._latest)
+
+    def records(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._latest.values())
+
+    def available_domains(self, tld: Optional[str] = None) -> List[str]:
+        return [record["domain"] for record in self.records()
+                if record["status"] == "Available" and (tld is None or record.get("tld") == tld)]
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def known_words(store_paths: Iterable[str] = (), use_cache: bool = True) -> Set[str]:
+    """Lowercase words already checked, from the WHOIS cache and any result stores."""
+    words = get_whois_cache().known_labels() if use_cache else set()
+    for path in store_paths:
+        if os.path.exists(path):
+            store = ResultStore(path)
+            words.update(record["word"].lower() for record in store.records())
+            store.close()
+    return words
+
+
+def results_store_filename(list_type_identifier: str) -> str:
+    return f"results_{list_type_identifier}.jsonl"
+
+
+def make_run_id(list_type_identifier: str, tlds: List[str]) -> str:
+    return f"{list_type_identifier}:{','.join(sorted(tlds))}"
+
+
+def _batched(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    batch: List[str] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _check_pairs(word_tld_pairs: List[Tuple[str, str]], offset: int,
+                 done: Dict[str, Dict[str, Any]], max_workers: int, use_cache: bool,
+                 scheduler: Optional[WhoisScheduler], prefilter: Optional[DnsPrefilter],
+                 store: Optional[ResultStore], run_id: Optional[str],
+                 metrics: Optional[MetricsRecorder],
+                 cancel_event: Optional[threading.Event]) -> Iterator[Dict[str, Any]]:
+    full_domains = [word + tld for word, tld in word_tld_pairs]
+    pending_indexes = []
+    for idx, full_domain in enumerate(full_domains):
+        previous = done.get(full_domain.lower())
+        if previous is None:
+            pending_indexes.append(idx)
+        else:
+            yield dict(previous, index=offset + idx, resumed=True)
+
+    pending_domains = [full_domains[idx] for idx in pending_indexes]
+    for pending_idx, full_domain, status in check_domains_concurrently(
+            pending_domains, max_workers, use_cache, scheduler, prefilter, metrics,
+            cancel_event):
+        idx = pending_indexes[pending_idx]
+        word, tld = word_tld_pairs[idx]
+        record = {
+            "word": word,
+            "tld": tld,
+            "domain": full_domain,
+            "status": status,
+            "price": tld_prices.get(tld),
+            "checked_at": datetime.datetime.now().isoformat(),
+        }
+        if store is not None:
+            store.append(dict(record, run_id=run_id))
+        yield dict(record, index=offset + idx)
+
+
+def check_words(words: Iterable[str], tlds: List[str],
+                max_workers: int = DEFAULT_MAX_WORKERS,
+                use_cache: bool = True,
+                scheduler: Optional[WhoisScheduler] = None,
+                prefilter: Optional[DnsPrefilter] = None,
+                store: Optional[ResultStore] = None,
+                run_id: Optional[str] = None,
+                metrics: Optional[MetricsRecorder] = None,
+                cancel_event: Optional[threading.Event] = None,
+                batch_size: int = CHECK_BATCH_WORDS) -> Iterator[Dict[str, Any]]:
+    """Check the word x TLD cross product, yielding one record per domain as it completes.
+
+    ``words`` may be any iterable (e.g. :func:`iter_words`); it is consumed
+    ``batch_size`` words at a time so huge candidate files are never held in
+    memory. ``index`` is the position in the full cross product.
+
+    With a ``store``, every result is appended as soon as it arrives and
+    domains already checked by an unfinished run with the same ``run_id`` are
+    replayed from the store (``"resumed": True``) instead of being re-checked.
+    """
+    if store is not None and run_id is None:
+        run_id = make_run_id("adhoc", tlds)
+    done = store.completed_in_run(run_id) if store is not None else {}
+
+    offset = 0
+    for batch in _batched(words, batch_size):
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        word_tld_pairs = [(word, tld) for word in batch for tld in tlds]
+        yield from _check_pairs(word_tld_pairs, offset, done, max_workers, use_cache,
+                                scheduler, prefilter, store, run_id, metrics, cancel_event)
+        offset += len(word_tld_pairs)
+
+    if store is not None and not (cancel_event is not None and cancel_event.is_set()):
+        store.mark_run_complete(run_id)
+
+
+# --- بازبینی دوره‌ای دامنه‌ها برای یافتن دامنه‌های آزادشده (drop-watch) ---
+
+# هر وضعیت پس از این مدت (ثانیه) کهنه حساب می‌شود و دوباره بررسی می‌شود
+DROP_WATCH_INTERVALS = {
+    "Registered": 30 * 24 * 3600,
+    "Available": 7 * 24 * 3600,
+    "Error": 24 * 3600,
+}
+# دامنه‌هایی که کمتر از این مدت تا انقضایشان مانده (یا منقضی شده‌اند) روزانه بررسی می‌شوند
+DROP_WATCH_EXPIRY_WINDOW = 45 * 24 * 3600
+DROP_WATCH_NEAR_EXPIRY_INTERVAL = 24 * 3600
+DEFAULT_DROP_WATCH_LIMIT = 500
+
+
+def recheck_due_at(status: str, checked_at: float,
+                   expiration_date: Optional[float] = None,
+                   now: Optional[float] = None) -> Tuple[float, bool]:
+    """When a domain last seen with ``status`` should be checked again, and whether it is near expiry."""
+    now = time.time() if now is None else now
+    due_at = checked_at + DROP_WATCH_INTERVALS.get(
+        _status_kind(status), DROP_WATCH_INTERVALS["Error"])
+    if status == "Registered" and expiration_date is not None:
+        # نزدیکی به انقضا نسبت به اکنون سنجیده می‌شود، نه زمان آخرین بررسی
+        if expiration_date - now <= DROP_WATCH_EXPIRY_WINDOW:
+            return checked_at + DROP_WATCH_NEAR_EXPIRY_INTERVAL, True
+        due_at = min(due_at, expiration_date - DROP_WATCH_EXPIRY_WINDOW)
+    return due_at, False
+
+
+def plan_rechecks(cache: Optional[WhoisCache] = None, now: Optional[float] = None,
+                  limit: Optional[int] = DEFAULT_DROP_WATCH_LIMIT) -> List[Dict[str, Any]]:
+    """Domains from the check history that are due for a re-check, most urgent first.
+
+    Registered names close to (or past) their expiry date come first, soonest
+    expiry first; then every other stale result, longest overdue first.
+    """
+    cache = cache or get_whois_cache()
+    now = time.time() if now is None else now
+    min_interval = min(DROP_WATCH_NEAR_EXPIRY_INTERVAL, *DROP_WATCH_INTERVALS.values())
+    plan = []
+    for entry in cache.latest_checks(checked_before=now - min_interval):
+        due_at, near_expiry = recheck_due_at(
+            entry["status"], entry["checked_at"], entry["expiration_date"], now)
+        if due_at <= now:
+            plan.append(dict(entry, due_at=due_at,
+                             reason="near_expiry" if near_expiry else "stale"))
+    plan.sort(key=lambda entry: (0, entry["expiration_date"]) if entry["reason"] == "near_expiry"
+              else (1, entry["due_at"]))
+    return plan[:limit] if limit else plan
+
+
+def import_history(records: Iterable[Dict[str, Any]],
+                   cache: Optional[WhoisCache] = None,
+                   default_status: str = "Available") -> int:
+    """Add old check results (``domain`` + ISO ``checked_at``) to the history; returns how many were new.
+
+    ``available_domains_*.json`` entries carry no status, hence ``default_status``.
+    """
+    cache = cache or get_whois_cache()
+    imported = 0
+    for record in records:
+        domain, checked_at = record.get("domain"), record.get("checked_at")
+        if not domain or not checked_at:
+            continue
+        try:
+            timestamp = datetime.datetime.fromisoformat(checked_at).timestamp()
+        except (TypeError, ValueError):
+            continue
+        imported += cache.add_history(domain, record.get("status", default_status), timestamp,
+                                      parse_expiration_date(record.get("expiration_date")))
+    return imported
+
+
+def recheck_due(limit: Optional[int] = DEFAULT_DROP_WATCH_LIMIT,
+                max_workers: int = DEFAULT_MAX_WORKERS,
+                scheduler: Optional[WhoisScheduler] = None,
+                prefilter: Optional[DnsPrefilter] = None,
+                metrics: Optional[MetricsRecorder] = None,
+                cancel_event: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+    """Re-check the domains :func:`plan_rechecks` selects, yielding one record per domain.
+
+    Each record carries the fresh ``status`` next to the ``previous_status``
+    and why the domain was picked; the new results land in the history.
+    """
+    cache = get_whois_cache()
+    plan = plan_rechecks(cache, limit=limit)
+    domains = [entry["domain"] for entry in plan]
+    # کش را برای این دامنه‌ها دور بزن تا پاسخ تازه WHOIS در تاریخچه ثبت شود
+    cache.invalidate(domains)
+    for idx, domain, status in check_domains_concurrently(
+            domains, max_workers, True, scheduler, prefilter, metrics, cancel_event):
+        entry = plan[idx]
+        expiration_date = entry["expiration_date"]
+        yield {
+            "domain": domain,
+            "status": status,
+            "previous_status": entry["status"],
+            # خطای گذرا تغییر وضعیت حساب نمی‌شود
+            "changed": _status_kind(status) != "Error" and status != entry["status"],
+            "reason": entry["reason"],
+            "expiration_date": datetime.datetime.fromtimestamp(
+                expiration_date, datetime.timezone.utc).date().isoformat()
+            if expiration_date is not None else None,
+            "previous_checked_at": datetime.datetime.fromtimestamp(
+                entry["checked_at"]).isoformat(),
+            "checked_at": datetime.datetime.now().isoformat(),
+        }
+
+
+# --- برنامه‌ریز جستجو بر اساس ارزش (کلمه کوتاه، منبع بهتر، پسوند ارزان‌تر) ---
+
+# وزن هر لیست کلمات؛ لیست‌های منتخب‌تر ارزش بیشتری دارند
+SOURCE_WEIGHTS = {
+    "curated_100_ai_trade_words.json": 1.0,
+    "curated_500_ai_trade_words.json": 0.8,
+    "curated_ai_trade_words.json": 0.6,
+    "three_letter_words.json": 0.5,
+    "four_letter_words.json": 0.4,
+}
+DEFAULT_SOURCE_WEIGHT = 0.5
+# کوتاه‌ترین طولی که کامل امتیاز می‌گیرد؛ هر حرف بیشتر امتیاز طول را کم می‌کند
+SCORE_BASE_LENGTH = 3
+# قیمتی (ریال) که در آن امتیاز قیمت نصف می‌شود
+SCORE_PRICE_SCALE = 5_000_000
+
+
+def source_weight(source: str) -> float:
+    return SOURCE_WEIGHTS.get(os.path.basename(source), DEFAULT_SOURCE_WEIGHT)
+
+
+def candidate_score(word: str, price: float, weight: float = DEFAULT_SOURCE_WEIGHT) -> float:
+    """Value of checking ``word`` + a TLD costing ``price``: higher is checked first.
+
+    Shorter words, better sources and cheaper TLDs all raise the score; each
+    factor is in (0, 1] so no single one dominates.
+    """
+    length_value = 1.0 / (1 + max(0, len(word) - SCORE_BASE_LENGTH))
+    price_value = 1.0 / (1 + price / SCORE_PRICE_SCALE)
+    return weight * length_value * price_value
+
+
+def plan_search(sources: Dict[str, Iterable[str]], tlds: Iterable[str],
+                max_price: Optional[float] = None,
+                max_lookups: Optional[int] = None,
+                keep_tlds: Iterable[str] = ()) -> List[Dict[str, Any]]:
+    """Rank every (word, TLD) pair of ``sources`` (name -> words) by :func:`candidate_score`.
+
+    TLDs above ``max_price`` are pruned unless listed in ``keep_tlds`` (e.g.
+    TLDs the user asked for by name); TLDs without a known price score 0 and
+    are only kept when there is no ceiling or they are in ``keep_tlds``. A word present in several
+    sources keeps its best weight. With ``max_lookups`` only the top pairs are
+    kept, using a bounded heap, so the full cross product is never built.
+    """
+    keep_tlds = set(keep_tlds)
+    priced_tlds = []
+    for tld in dict.fromkeys(tlds):
+        price = price_to_number(tld_prices.get(tld, ""))
+        if max_price is None or price <= max_price or tld in keep_tlds:
+            priced_tlds.append((tld, price))
+
+    weights: Dict[str, Tuple[float, str]] = {}
+    for source, words in sources.items():
+        weight = source_weight(source)
+        for word in words:
+            key = word.lower()
+            if key not in weights or weight > weights[key][0]:
+                weights[key] = (weight, word)
+
+    candidates = (
+        {"word": word, "tld": tld, "domain": word + tld, "price": tld_prices.get(tld),
+         "score": candidate_score(word, price, weight)}
+        for weight, word in weights.values() for tld, price in priced_tlds)
+    if max_lookups:
+        return heapq.nlargest(max_lookups, candidates, key=lambda candidate: candidate["score"])
+    return sorted(candidates, key=lambda candidate: candidate["score"], reverse=True)
+
+
+def run_search_plan(plan: List[Dict[str, Any]],
+                    max_seconds: Optional[float] = None,
+                    max_workers: int = DEFAULT_MAX_WORKERS,
+                    use_cache: bool = True,
+                    scheduler: Optional[WhoisScheduler] = None,
+                    prefilter: Optional[DnsPrefilter] = None,
+                    store: Optional[ResultStore] = None,
+                    run_id: Optional[str] = None,
+                    metrics: Optional[MetricsRecorder] = None,
+                    cancel_event: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+    """Check ``plan`` (from :func:`plan_search`) best-first, stopping after ``max_seconds``.
+
+    The lookup budget is the plan length. Lookups are submitted in rank order
+    (interleaved across WHOIS servers), so the first answers are the most
+    valuable ones. ``index`` is the rank; records also carry the ``score``.
+    """
+    if store is not None and run_id is None:
+        run_id = make_run_id("plan", sorted({entry["tld"] for entry in plan}))
+    done = store.completed_in_run(run_id) if store is not None else {}
+    stop = threading.Event()
+    timer = None
+    if max_seconds is not None:
+        timer = threading.Timer(max_seconds, stop.set)
+        timer.daemon = True
+        timer.start()
+    pairs = [(entry["word"], entry["tld"]) for entry in plan]
+    try:
+        for record in _check_pairs(pairs, 0, done, max_workers, use_cache, scheduler,
+                                   prefilter, store, run_id, metrics, stop):
+            yield dict(record, score=plan[record["index"]]["score"])
+            if cancel_event is not None and cancel_event.is_set():
+                stop.set()
+    finally:
+        if timer is not None:
+            timer.cancel()
+    if store is not None and not stop.is_set():
+        store.mark_run_complete(run_id)
@@ -0,0 +1,208 @@
+"""Background check jobs that outlive a single Streamlit script run.
+
+Every widget interaction re-executes the Streamlit script, so a check running
+inside a button handler is lost as soon as the user touches anything. Jobs
+submitted here run on a process-wide worker pool instead; the UI only polls
+:meth:`CheckJob.snapshot` and :meth:`CheckJob.results`.
+
+Results still go to the per-list JSONL :class:`~domain_checker.ResultStore`,
+so a cancelled (or crashed) job resumed later skips every domain it already
+checked. Like ``domain_checker``, this module does not import streamlit.
+"""
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from domain_checker import (DEFAULT_MAX_WORKERS, DEFAULT_SERVER_RATE, DEFAULT_WHOIS_BACKEND,
+                            DnsPrefilter, MetricsRecorder, ResultStore, WhoisScheduler,
+                            check_words, make_run_id, results_store_filename)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_CANCELLED = "cancelled"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+ACTIVE_JOB_STATES = (JOB_QUEUED, JOB_RUNNING)
+
+# هر کار خودش max_workers رشته WHOIS دارد؛ تعداد کارهای هم‌زمان را محدود نگه دار
+DEFAULT_MAX_RUNNING_JOBS = 2
+
+
+class CheckJob:
+    """One word x TLD check running in the background, with incrementally filled results."""
+
+    def __init__(self, job_id: int, words: List[str], tlds: List[str], list_id: str,
+                 label: str = "", max_workers: int = DEFAULT_MAX_WORKERS,
+                 use_cache: bool = True, rate: float = DEFAULT_SERVER_RATE,
+                 backend: str = DEFAULT_WHOIS_BACKEND, use_dns_prefilter: bool = False,
+                 run_id: Optional[str] = None, scheduler: Optional[WhoisScheduler] = None):
+        self.id = job_id
+        self.words = list(words)
+        self.tlds = list(tlds)
+        self.list_id = list_id
+        self.label = label or list_id
+        self.max_workers = max_workers
+        self.use_cache = use_cache
+        self.rate = rate
+        self.backend = backend
+        self.use_dns_prefilter = use_dns_prefilter
+        self.run_id = run_id or make_run_id(list_id, self.tlds)
+        self.total = len(self.words) * len(self.tlds)
+        self.state = JOB_QUEUED
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.done_count = 0
+        self.resumed_count = 0
+        self.metrics = MetricsRecorder()
+        self.scheduler = scheduler or WhoisScheduler(rate=rate, backend=backend)
+        self.prefilter = DnsPrefilter() if use_dns_prefilter else None
+        self.cancel_event = threading.Event()
+        self.store_path = results_store_filename(list_id)
+        self._records: List[Optional[Dict[str, Any]]] = [None] * self.total
+        self._lock = threading.Lock()
+
+    @property
+    def progress(self) -> float:
+        return self.done_count / self.total if self.total else 1.0
+
+    @property
+    def active(self) -> bool:
+        return self.state in ACTIVE_JOB_STATES
+
+    def add_record(self, record: Dict[str, Any]):
+        with self._lock:
+            self._records[record["index"]] = record
+            self.done_count += 1
+            self.resumed_count += bool(record.get("resumed"))
+
+    def results(self) -> List[Dict[str, Any]]:
+        """Records finished so far, in word x TLD order."""
+        with self._lock:
+            return [record for record in self._records if record is not None]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Plain summary of the job for listing; safe to call while it runs."""
+        finished = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "label": self.label,
+            "tlds": ", ".join(self.tlds),
+            "state": self.state,
+            "done": self.done_count,
+            "total": self.total,
+            "progress": self.progress,
+            "resumed": self.resumed_count,
+            "elapsed_s": finished - self.started_at if self.started_at else 0.0,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """Process-wide registry and worker pool for :class:`CheckJob` instances."""
+
+    def __init__(self, max_running_jobs: int = DEFAULT_MAX_RUNNING_JOBS):
+        self._executor = ThreadPoolExecutor(max_workers=max_running_jobs,
+                                            thread_name_prefix="check-job")
+        self._jobs: Dict[int, CheckJob] = {}
+        self._futures: Dict[int, Future] = {}
+        self._stores: Dict[str, ResultStore] = {}
+        self._schedulers: Dict[Tuple[float, str], WhoisScheduler] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _store_for(self, path: str) -> ResultStore:
+        # کارهای یک لیست یک نمونه مشترک از فایل نتایج را به اشتراک می‌گذارند
+        with self._lock:
+            store = self._stores.get(path)
+            if store is None:
+                store = self._stores[path] = ResultStore(path)
+            return store
+
+    def _scheduler_for(self, rate: float, backend: str) -> WhoisScheduler:
+        # محدودیت نرخ هر سرور WHOIS برای همه کارهای هم‌زمان مشترک است، نه جدا برای هر کار
+        with self._lock:
+            key = (rate, backend)
+            scheduler = self._schedulers.get(key)
+            if scheduler is None:
+                scheduler = self._schedulers[key] = WhoisScheduler(rate=rate, backend=backend)
+            return scheduler
+
+    def submit(self, words: List[str], tlds: List[str], list_id: str, **options) -> CheckJob:
+        """Queue a check of ``words`` x ``tlds``; ``options`` are passed to :class:`CheckJob`."""
+        if options.get("scheduler") is None:
+            options["scheduler"] = self._scheduler_for(
+                options.get("rate", DEFAULT_SERVER_RATE),
+                options.get("backend", DEFAULT_WHOIS_BACKEND))
+        job = CheckJob(next(self._ids), words, tlds, list_id, **options)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._futures[job.id] = self._executor.submit(self._run, job)
+        return job
+
+    def _run(self, job: CheckJob):
+        if job.cancel_event.is_set():
+            return
+        job.state = JOB_RUNNING
+        job.started_at = time.time()
+        try:
+            for record in check_words(job.words, job.tlds, job.max_workers, job.use_cache,
+                                      job.scheduler, job.prefilter,
+                                      self._store_for(job.store_path), job.run_id,
+                                      job.metrics, job.cancel_event):
+                job.add_record(record)
+        except Exception as e:
+            job.error = str(e)
+            job.state = JOB_FAILED
+        else:
+            job.state = JOB_CANCELLED if job.cancel_event.is_set() else JOB_DONE
+        finally:
+            job.finished_at = time.time()
+
+    def cancel(self, job_id: int) -> bool:
+        """Stop a queued or running job; lookups already in flight still finish."""
+        job = self.get(job_id)
+        if job is None or not job.active:
+            return False
+        job.cancel_event.set()
+        if self._futures[job_id].cancel():
+            job.state = JOB_CANCELLED
+            job.finished_at = time.time()
+        return True
+
+    def resume(self, job_id: int) -> Optional[CheckJob]:
+        """Re-submit a stopped job; domains it already stored are replayed, not re-checked."""
+        job = self.get(job_id)
+        if job is None or job.active:
+            return None
+        return self.submit(job.words, job.tlds, job.list_id, label=job.label,
+                           max_workers=job.max_workers, use_cache=job.use_cache,
+                           rate=job.rate, backend=job.backend,
+                           use_dns_prefilter=job.use_dns_prefilter, run_id=job.run_id)
+
+    def get(self, job_id: int) -> Optional[CheckJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[CheckJob]:
+        """All jobs of this process, newest first."""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.id, reverse=True)
+
+    def has_active(self) -> bool:
+        return any(job.active for job in self.jobs())
+
+
+_job_manager: Optional[JobManager] = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager()
+    return _job_manager
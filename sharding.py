@@ -0,0 +1,493 @@
+"""Coordinator/worker mode: spread one word x TLD check over several processes or hosts.
+
+The coordinator splits the words into shards and leases them over a small
+HTTP/JSON API. Each worker runs the normal checker on its shard, with its own
+egress IP and its own per-server rate limits, and reports results back. The
+coordinator appends them to a single :class:`~domain_checker.ResultStore`,
+keeping the first Available/Registered result per domain and dropping later
+duplicates. Workers
+heartbeat while they run. A worker that stops heartbeating loses its lease,
+and the shard goes to the next worker that asks. A shard reported finished
+while some of its domains only have error results (e.g. a throttled worker)
+goes back to pending, preferably for another worker, up to ``--max-attempts``
+leases.
+
+The coordinator listens on 127.0.0.1 unless ``--host`` says otherwise. With a
+shared token (``--token`` or ``SHARDING_TOKEN``) it rejects every request that
+does not carry it; set one before listening on any other interface.
+
+::
+
+    export SHARDING_TOKEN=...   # the same shared secret on every host
+    python sharding.py coordinator --words curated_ai_trade_words.json --tld .io .app \
+        --store results_sharded.jsonl --host 0.0.0.0 --port 8765
+    python sharding.py worker --coordinator http://coordinator-host:8765   # on each host
+
+    # everything on one machine against the fake WHOIS server, killing one worker midway
+    python sharding.py local --processes 3 --kill-after 2
+"""
+import argparse
+import hmac
+import json
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+import domain_checker
+from domain_checker import (DEFAULT_MAX_WORKERS, DEFAULT_SERVER_RATE, DEFAULT_WHOIS_BACKEND,
+                            SETTLED_STATUSES, WHOIS_BACKENDS, DnsPrefilter, ResultStore,
+                            WhoisScheduler, check_words, iter_words, lookup_phase, make_run_id, normalize_tld)
+from whois_client import WhoisClient
+
+DEFAULT_SHARD_SIZE = 50
+DEFAULT_LEASE_SECONDS = 60.0
+DEFAULT_COORDINATOR_PORT = 8765
+# بخشی که پس از این تعداد اجاره هنوز دامنه قطعی‌نشده دارد بسته می‌شود
+DEFAULT_MAX_SHARD_ATTEMPTS = 3
+# کارگر نتایج را در این تعداد رکورد (یا با هر ضربان) به هماهنگ‌کننده می‌فرستد
+REPORT_EVERY = 25
+COORDINATOR_RETRIES = 5
+TOKEN_ENV = "SHARDING_TOKEN"
+TOKEN_HEADER = "X-Shard-Token"
+
+SHARD_PENDING = "pending"
+SHARD_LEASED = "leased"
+SHARD_DONE = "done"
+
+
+class ShardCoordinator:
+    """Leases word shards to workers and folds their results into one deduplicated store."""
+
+    def __init__(self, words: List[str], tlds: List[str], store: ResultStore,
+                 shard_size: int = DEFAULT_SHARD_SIZE,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 run_id: Optional[str] = None,
+                 max_attempts: int = DEFAULT_MAX_SHARD_ATTEMPTS):
+        self.tlds = list(tlds)
+        self.store = store
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.run_id = run_id or make_run_id("sharded", self.tlds)
+        self.duplicates = 0
+        self.releases = 0
+        self.requeues = 0
+        self._completed = False
+        self._lock = threading.Lock()
+        # نتایج اجرای ناتمام قبلی با همین run_id از فایل بازیابی می‌شوند
+        self._done_domains = set(store.completed_in_run(self.run_id))
+        self._shards: List[Dict[str, Any]] = []
+        for start in range(0, len(words), shard_size):
+            shard_words = words[start:start + shard_size]
+            self._shards.append({
+                "id": len(self._shards),
+                "words": shard_words,
+                "state": SHARD_DONE if self._shard_complete(shard_words) else SHARD_PENDING,
+                "worker": None,
+                "lease_expires": 0.0,
+                "leases": 0,
+                "failed_by": set(),
+            })
+
+    def _shard_complete(self, words: List[str]) -> bool:
+        return all((word + tld).lower() in self._done_domains
+                   for word in words for tld in self.tlds)
+
+    def lease(self, worker_id: str) -> Dict[str, Any]:
+        """Hand out the next free (or expired) shard; ``done`` once nothing is left."""
+        now = time.time()
+        with self._lock:
+            waiting = False
+            pending = []
+            for shard in self._shards:
+                if shard["state"] == SHARD_LEASED and shard["lease_expires"] <= now:
+                    # کارگر قبلی ضربان نفرستاده؛ احتمالاً از کار افتاده است
+                    shard["state"] = SHARD_PENDING
+                    self.releases += 1
+                if shard["state"] == SHARD_LEASED:
+                    waiting = True
+                elif shard["state"] == SHARD_PENDING:
+                    pending.append(shard)
+            # بخشی که این کارگر با خطا بسته، ترجیحاً به کارگر (و IP) دیگری داده می‌شود
+            shard = next((shard for shard in pending if worker_id not in shard["failed_by"]),
+                         pending[0] if pending else None)
+            if shard is not None:
+                shard.update(state=SHARD_LEASED, worker=worker_id,
+                             lease_expires=now + self.lease_seconds,
+                             leases=shard["leases"] + 1)
+                # کلماتی که همه دامنه‌هایشان ثبت شده دوباره فرستاده نمی‌شوند
+                words = [word for word in shard["words"]
+                         if not self._shard_complete([word])]
+                return {"shard": shard["id"], "words": words, "tlds": self.tlds,
+                        "lease_seconds": self.lease_seconds}
+            if waiting:
+                return {"wait": min(self.lease_seconds / 4, 5.0)}
+            return {"done": True}
+
+    def report(self, worker_id: str, shard_id: int, records: List[Dict[str, Any]],
+               final: bool = False) -> Dict[str, Any]:
+        """Store new results, renew the lease and, with ``final``, close the shard.
+
+        Returns ``ok: False`` when the shard was leased to someone else, so the
+        worker can drop it; its results are still kept if they are new.
+        """
+        with self._lock:
+            for record in records:
+                key = record["domain"].lower()
+                if key in self._done_domains:
+                    self.duplicates += 1
+                    continue
+                # خطاها ثبت می‌شوند ولی دامنه را قطعی نمی‌کنند؛ نتیجه قطعی بعدی جایگزین می‌شود
+                if record.get("status") in SETTLED_STATUSES:
+                    self._done_domains.add(key)
+                self.store.append(dict(record, run_id=self.run_id, worker=worker_id))
+            shard = self._shards[shard_id]
+            owner = shard["state"] == SHARD_LEASED and shard["worker"] == worker_id
+            if owner:
+                shard["lease_expires"] = time.time() + self.lease_seconds
+                if final and not self._shard_complete(shard["words"]) \
+                        and shard["leases"] < self.max_attempts:
+                    # دامنه‌هایی با نتیجه خطا (مثلاً محدودیت نرخ) به کارگر دیگری سپرده می‌شوند
+                    shard["failed_by"].add(worker_id)
+                    shard.update(state=SHARD_PENDING, worker=None)
+                    self.requeues += 1
+                elif final:
+                    shard.update(state=SHARD_DONE, worker=None)
+            # با دامنه‌های قطعی‌نشده اجرا ناتمام می‌ماند تا اجرای بعدی فقط آن‌ها را بررسی کند
+            if not self._completed and self.finished() and \
+                    self._shard_complete([word for shard in self._shards for word in shard["words"]]):
+                self._completed = True
+                self.store.mark_run_complete(self.run_id)
+            return {"ok": owner}
+
+    def finished(self) -> bool:
+        return all(shard["state"] == SHARD_DONE for shard in self._shards)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            states = [shard["state"] for shard in self._shards]
+            return {
+                "run_id": self.run_id,
+                "shards": len(states),
+                "pending": states.count(SHARD_PENDING),
+                "leased": states.count(SHARD_LEASED),
+                "done": states.count(SHARD_DONE),
+                "domains_done": len(self._done_domains),
+                "domains_total": sum(len(shard["words"]) for shard in self._shards) * len(self.tlds),
+                "duplicates": self.duplicates,
+                "releases": self.releases,
+                "requeues": self.requeues,
+                "workers": sorted({shard["worker"] for shard in self._shards if shard["worker"]}),
+            }
+
+
+class _CoordinatorHandler(BaseHTTPRequestHandler):
+    def _send(self, payload: Dict[str, Any], code: int = 200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self) -> bool:
+        token = self.server.token
+        if not token or hmac.compare_digest(self.headers.get(TOKEN_HEADER, ""), token):
+            return True
+        self._send({"error": "invalid token"}, 403)
+        return False
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path == "/status":
+            self._send(self.server.coordinator.status())
+        else:
+            self._send({"error": "not found"}, 404)
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send({"error": "invalid JSON"}, 400)
+            return
+        coordinator = self.server.coordinator
+        if self.path == "/lease":
+            self._send(coordinator.lease(request["worker"]))
+        elif self.path == "/report":
+            self._send(coordinator.report(request["worker"], request["shard"],
+                                          request.get("records", []), request.get("final", False)))
+        else:
+            self._send({"error": "not found"}, 404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CoordinatorServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, coordinator: ShardCoordinator, host: str = "127.0.0.1",
+                 port: int = DEFAULT_COORDINATOR_PORT, token: Optional[str] = None):
+        self.coordinator = coordinator
+        self.token = token
+        super().__init__((host, port), _CoordinatorHandler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{'127.0.0.1' if host == '0.0.0.0' else host}:{port}"
+
+    def start(self) -> "CoordinatorServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def _call(coordinator_url: str, path: str, payload: Dict[str, Any],
+          token: Optional[str] = None, timeout: float = 30.0) -> Dict[str, Any]:
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers[TOKEN_HEADER] = token
+    request = urllib.request.Request(
+        coordinator_url.rstrip("/") + path, data=json.dumps(payload).encode("utf-8"),
+        headers=headers)
+    for attempt in range(COORDINATOR_RETRIES):
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            # توکن نادرست با تلاش دوباره درست نمی‌شود
+            if e.code == 403 or attempt == COORDINATOR_RETRIES - 1:
+                raise
+            time.sleep(2 ** attempt)
+        except (urllib.error.URLError, OSError):
+            if attempt == COORDINATOR_RETRIES - 1:
+                raise
+            time.sleep(2 ** attempt)
+    return {}
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def run_worker(coordinator_url: str, worker_id: Optional[str] = None,
+               max_workers: int = DEFAULT_MAX_WORKERS, use_cache: bool = True,
+               scheduler: Optional[WhoisScheduler] = None,
+               prefilter: Optional[DnsPrefilter] = None, token: Optional[str] = None) -> int:
+    """Lease and check shards until the coordinator has none left; returns domains checked."""
+    worker_id = worker_id or default_worker_id()
+    checked = 0
+    while True:
+        lease = _call(coordinator_url, "/lease", {"worker": worker_id}, token)
+        if lease.get("done"):
+            return checked
+        if "wait" in lease:
+            time.sleep(lease["wait"])
+            continue
+        shard_id = lease["shard"]
+        lost = threading.Event()
+        pending: List[Dict[str, Any]] = []
+        pending_lock = threading.Lock()
+
+        def flush(final: bool = False):
+            with pending_lock:
+                records = pending[:]
+                del pending[:]
+            reply = _call(coordinator_url, "/report", {"worker": worker_id, "shard": shard_id,
+                                                       "records": records, "final": final}, token)
+            if not reply.get("ok"):
+                lost.set()
+
+        # ضربان مستقل از سرعت پاسخ‌ها تا اجاره در پرس‌وجوهای کند منقضی نشود
+        stop_heartbeat = threading.Event()
+
+        def heartbeat():
+            while not stop_heartbeat.wait(lease["lease_seconds"] / 3):
+                flush()
+
+        heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+        heartbeat_thread.start()
+        try:
+            for record in check_words(lease["words"], lease["tlds"], max_workers, use_cache,
+                                      scheduler, prefilter, cancel_event=lost):
+                record.pop("index", None)
+                with pending_lock:
+                    pending.append(record)
+                    should_flush = len(pending) >= REPORT_EVERY
+                checked += 1
+                if should_flush:
+                    flush()
+        finally:
+            stop_heartbeat.set()
+            heartbeat_thread.join()
+        if not lost.is_set():
+            flush(final=True)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    modes = parser.add_subparsers(dest="mode", required=True)
+
+    coordinator = modes.add_parser("coordinator", help="serve shards and collect results")
+    local = modes.add_parser("local", help="coordinator, fake WHOIS server and worker "
+                                           "processes on this machine")
+    for mode in (coordinator, local):
+        mode.add_argument("--words", nargs="+", default=["curated_ai_trade_words.json"],
+                          help="word lists (default: %(default)s)")
+        mode.add_argument("--tld", nargs="+", default=[".io"],
+                          help="TLDs to check (default: %(default)s)")
+        mode.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE,
+                          help="words per shard (default: %(default)s)")
+        mode.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS,
+                          help="lease lifetime without a heartbeat (default: %(default)s)")
+        mode.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_SHARD_ATTEMPTS,
+                          help="leases per shard while some of its domains only have errors "
+                               "(default: %(default)s)")
+        mode.add_argument("--store", default="results_sharded.jsonl",
+                          help="shared JSONL result store (default: %(default)s)")
+        mode.add_argument("--port", type=int, default=DEFAULT_COORDINATOR_PORT,
+                          help="coordinator port, 0 for any (default: %(default)s)")
+    coordinator.add_argument("--host", default="127.0.0.1",
+                             help="interface to listen on; use 0.0.0.0 for workers on other "
+                                  "hosts, together with a token (default: %(default)s)")
+    local.add_argument("--processes", type=int, default=3,
+                       help="worker processes to start (default: %(default)s)")
+    local.add_argument("--kill-after", type=float,
+                       help="kill the first worker after this many seconds to test re-leasing")
+    local.add_argument("--latency", type=float, default=0.05,
+                       help="fake WHOIS server latency in seconds (default: %(default)s)")
+    local.add_argument("--error-rate", type=float, default=0.0,
+                       help="share of fake WHOIS queries answered with a rate-limit error "
+                            "(default: %(default)s)")
+
+    worker = modes.add_parser("worker", help="check shards leased from a coordinator")
+    worker.add_argument("--coordinator", required=True, help="coordinator URL")
+    worker.add_argument("--id", help="worker id (default: host-pid)")
+    for mode in (coordinator, worker):
+        mode.add_argument("--token", default=os.environ.get(TOKEN_ENV),
+                          help=f"shared secret between coordinator and workers "
+                               f"(default: ${TOKEN_ENV})")
+    for mode in (worker, local):
+        mode.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS,
+                          help="concurrent lookups per worker (default: %(default)s)")
+        # سرور جعلی محدودیت نرخ ندارد؛ در حالت محلی سقف نرخ بالا است
+        mode.add_argument("--rate", type=float,
+                          default=DEFAULT_SERVER_RATE if mode is worker else 1000.0,
+                          help="max queries per second per WHOIS server (default: %(default)s)")
+    worker.add_argument("--backend", choices=WHOIS_BACKENDS, default=DEFAULT_WHOIS_BACKEND)
+    worker.add_argument("--no-cache", action="store_true",
+                        help="bypass the on-disk WHOIS cache")
+    worker.add_argument("--dns-prefilter", action="store_true")
+    worker.add_argument("--whois-server", metavar="HOST:PORT",
+                        help="send every port-43 query here (e.g. the fake server), no RDAP")
+    worker.add_argument("--no-history", action="store_true",
+                        help="do not add results to the check history (for fake-server runs)")
+    return parser.parse_args(argv)
+
+
+def _load_coordinator(args: argparse.Namespace) -> Tuple[ShardCoordinator, CoordinatorServer]:
+    words = list(dict.fromkeys(word for path in args.words for word in iter_words(path)))
+    tlds = [normalize_tld(tld) for tld in args.tld]
+    list_id = "+".join(os.path.splitext(os.path.basename(path))[0] for path in args.words)
+    coordinator = ShardCoordinator(words, tlds, ResultStore(args.store), args.shard_size,
+                                   args.lease_seconds, make_run_id("sharded:" + list_id, tlds),
+                                   args.max_attempts)
+    host = getattr(args, "host", "127.0.0.1")
+    # در حالت محلی یک توکن تصادفی فقط بین همین پردازش‌ها به اشتراک گذاشته می‌شود
+    token = args.token if args.mode == "coordinator" else secrets.token_hex(16)
+    return coordinator, CoordinatorServer(coordinator, host, args.port, token)
+
+
+def _wait_until_finished(coordinator: ShardCoordinator, interval: float = 1.0):
+    while not coordinator.finished():
+        status = coordinator.status()
+        print(f"shards {status['done']}/{status['shards']} done, {status['leased']} leased; "
+              f"{status['domains_done']}/{status['domains_total']} domains, "
+              f"{status['releases']} re-leased, {status['requeues']} retried", file=sys.stderr)
+        time.sleep(interval)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.mode == "worker":
+        if args.no_history:
+            domain_checker.RECORD_HISTORY = False
+        client = None
+        if args.whois_server:
+            host, port = args.whois_server.rsplit(":", 1)
+            client = WhoisClient(use_rdap=False, connect_to=(host, int(port)), phase=lookup_phase)
+        scheduler = WhoisScheduler(rate=args.rate, backend=args.backend, client=client)
+        prefilter = DnsPrefilter() if args.dns_prefilter else None
+        checked = run_worker(args.coordinator, args.id, args.workers, not args.no_cache,
+                             scheduler, prefilter, args.token)
+        print(f"worker finished after checking {checked} domains", file=sys.stderr)
+        return 0
+
+    try:
+        coordinator, server = _load_coordinator(args)
+    except ValueError as e:
+        print(f"Invalid word list: {e}", file=sys.stderr)
+        return 1
+    server.start()
+    print(f"coordinator listening on {server.url}", file=sys.stderr)
+    if not server.token and server.server_address[0] not in ("127.0.0.1", "::1"):
+        print(f"warning: no token set; anyone who can reach {server.url} can lease shards "
+              f"and write results (set --token or ${TOKEN_ENV})", file=sys.stderr)
+    if args.mode == "coordinator":
+        try:
+            _wait_until_finished(coordinator)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+            coordinator.store.close()
+        print(json.dumps(coordinator.status(), ensure_ascii=False))
+        return 0
+
+    # حالت محلی: سرور WHOIS جعلی و چند پردازش کارگر روی همین ماشین
+    from bench_whois import FakeWhoisServer
+    fake = FakeWhoisServer(latency=args.latency, error_rate=args.error_rate).start()
+    fake_host, fake_port = fake.address
+    processes = [subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "worker", "--coordinator", server.url,
+         "--id", f"local-{n}", "--workers", str(args.workers), "--rate", str(args.rate),
+         "--no-cache", "--no-history", "--whois-server", f"{fake_host}:{fake_port}"],
+        env={**os.environ, TOKEN_ENV: server.token})
+        for n in range(args.processes)]
+    try:
+        if args.kill_after is not None:
+            time.sleep(args.kill_after)
+            processes[0].kill()
+            print("killed worker local-0", file=sys.stderr)
+        _wait_until_finished(coordinator)
+        for process in processes:
+            process.wait()
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.kill()
+        server.stop()
+        fake.stop()
+        coordinator.store.close()
+    status = coordinator.status()
+    print(json.dumps(status, ensure_ascii=False))
+    return 0 if status["domains_done"] == status["domains_total"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
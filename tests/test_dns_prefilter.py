@@ -0,0 +1,49 @@
+import socket
+import threading
+
+import pytest
+
+dns = pytest.importorskip("dns")
+import dns.message  # noqa: E402
+import dns.rcode  # noqa: E402
+import dns.rrset  # noqa: E402
+
+from domain_checker import DnsPrefilter  # noqa: E402
+
+
+@pytest.fixture
+def stub_resolver():
+    """UDP stub: NS records for taken.test, NXDOMAIN for everything else."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+
+    def serve():
+        while True:
+            try:
+                data, client = sock.recvfrom(512)
+            except OSError:
+                return
+            query = dns.message.from_wire(data)
+            response = dns.message.make_response(query)
+            name = query.question[0].name
+            if name.to_text() == "taken.test.":
+                response.answer.append(dns.rrset.from_text(
+                    name, 300, "IN", "NS", "ns1.example.net.", "ns2.example.net."))
+            else:
+                response.set_rcode(dns.rcode.NXDOMAIN)
+            sock.sendto(response.to_wire(), client)
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield sock.getsockname()
+    sock.close()
+
+
+def test_prefilter_against_stub_resolver(stub_resolver):
+    host, port = stub_resolver
+    prefilter = DnsPrefilter(nameservers=[host], port=port, timeout=2.0)
+
+    status, fields = prefilter.check("taken.test")
+    assert status == "Registered"
+    assert fields["source"] == "dns"
+    assert prefilter.check("free.test") is None
+    assert (prefilter.whois_saved, prefilter.passed_through) == (1, 1)
@@ -0,0 +1,38 @@
+from domain_checker import WhoisCache, plan_rechecks
+
+DAY = 24 * 3600
+NOW = 1_800_000_000.0
+
+
+def test_near_expiry_is_measured_from_now(tmp_path):
+    cache = WhoisCache(str(tmp_path / "cache.sqlite3"))
+    for n in range(3):
+        cache.add_history(f"old{n}.digital", "Available", NOW - 100 * DAY)
+    # آخرین بررسی قبل از ورود به پنجره انقضا بوده است
+    cache.add_history("dropping.com", "Registered", NOW - 60 * DAY,
+                      expiration_date=NOW + 2 * DAY)
+
+    plan = plan_rechecks(cache, now=NOW, limit=3)
+
+    assert plan[0]["domain"] == "dropping.com"
+    assert plan[0]["reason"] == "near_expiry"
+
+
+def test_history_is_recorded_without_cache(tmp_path, monkeypatch):
+    import domain_checker
+
+    cache = WhoisCache(str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(domain_checker, "get_whois_cache", lambda: cache)
+
+    class _Scheduler:
+        def lookup(self, domain):
+            return "Registered", {"expiration_date": "2030-03-14T00:00:00Z"}
+
+    status = domain_checker.check_domain_availability(
+        "example.com", use_cache=False, scheduler=_Scheduler())
+
+    assert status == "Registered"
+    assert cache.get("example.com") is None
+    [entry] = cache.history("example.com")
+    assert entry["status"] == "Registered"
+    assert entry["expiration_date"] is not None
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from domain_checker import iter_words
+
+WORDS = ["alpha", "beta", 'ga"m\\ma', "دلتا", "eé", "", "zeta"]
+
+
+def _write(tmp_path, text, name="words.json"):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 64, 1 << 16])
+@pytest.mark.parametrize("dump", [
+    lambda words: json.dumps(words),
+    lambda words: json.dumps(words, ensure_ascii=False, indent=2),
+    lambda words: " \n" + json.dumps(words, separators=(",", ":")) + "\n",
+])
+def test_json_array_is_streamed_across_chunk_boundaries(tmp_path, chunk_size, dump):
+    path = _write(tmp_path, dump(WORDS))
+
+    assert list(iter_words(path, chunk_size)) == [word for word in WORDS if word]
+
+
+@pytest.mark.parametrize("text", [
+    '[["a"], "b"]',
+    '["a", 1]',
+    '["a" "b"]',
+    '["a",]',
+    '["a", "b"',
+    '["a", "b',
+    '{"words": ["a"]}',
+])
+@pytest.mark.parametrize("chunk_size", [1, 4, 1 << 16])
+def test_malformed_json_array_is_rejected(tmp_path, text, chunk_size):
+    path = _write(tmp_path, text)
+
+    with pytest.raises(ValueError):
+        list(iter_words(path, chunk_size))
+
+
+def test_empty_files_yield_nothing(tmp_path):
+    assert list(iter_words(_write(tmp_path, "[]"))) == []
+    assert list(iter_words(_write(tmp_path, "", name="empty.json"))) == []
@@ -0,0 +1,18 @@
+import time
+
+from jobs import JobManager
+
+
+def test_concurrent_jobs_share_the_per_server_scheduler(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = JobManager()
+    first = manager.submit([], [".io"], "first", rate=2.0, backend="raw")
+    second = manager.submit([], [".io"], "second", rate=2.0, backend="raw")
+    other = manager.submit([], [".io"], "other", rate=5.0, backend="raw")
+
+    assert first.scheduler is second.scheduler
+    assert other.scheduler is not first.scheduler
+
+    while manager.has_active():
+        time.sleep(0.01)
+    assert manager.resume(first.id).scheduler is first.scheduler
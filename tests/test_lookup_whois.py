@@ -0,0 +1,32 @@
+from whois.parser import WhoisEntry
+
+import domain_checker
+
+REGISTERED_WITH_FOOTER = """Domain Name: EXAMPLE.COM
+Registrar: Example Registrar, LLC
+Creation Date: 1995-08-14T04:00:00Z
+Registry Expiry Date: 2030-08-13T04:00:00Z
+Domain Status: clientTransferProhibited
+Name Server: A.IANA-SERVERS.NET
+
+The Whois and RDAP services are rate limited. Too many queries will be blocked.
+"""
+
+
+def test_rate_limit_footer_on_registered_record_is_not_transient(monkeypatch):
+    monkeypatch.setattr(domain_checker, "_query_whois",
+                        lambda domain: WhoisEntry.load(domain, REGISTERED_WITH_FOOTER))
+
+    status, fields = domain_checker._lookup_whois("example.com")
+
+    assert status == "Registered"
+    assert fields["registrar"] == "Example Registrar, LLC"
+
+
+def test_rate_limit_reply_without_record_is_transient(monkeypatch):
+    monkeypatch.setattr(domain_checker, "_query_whois", lambda domain: WhoisEntry.load(
+        domain, "Query rate limit exceeded. Please try again later.\n"))
+
+    status, _ = domain_checker._lookup_whois("example.com")
+
+    assert status.startswith(domain_checker.TRANSIENT_ERROR_PREFIX)
@@ -0,0 +1,35 @@
+from domain_checker import LookupMetrics, MetricsRecorder
+
+
+def _lookup(seconds, status="Available"):
+    metrics = LookupMetrics("example.io")
+    metrics.add("response", seconds)
+    metrics.status = status
+    metrics.total = seconds
+    return metrics
+
+
+def test_phase_summary_estimates_quantiles_from_buckets():
+    recorder = MetricsRecorder()
+    for n in range(1000):
+        recorder.record(_lookup(0.02 if n < 900 else 0.4))
+
+    rows = {row["phase"]: row for row in recorder.phase_summary()}
+    assert rows["response"]["count"] == 1000
+    assert abs(rows["response"]["total_s"] - (900 * 0.02 + 100 * 0.4)) < 1e-9
+    assert 10 <= rows["response"]["p50_ms"] <= 25
+    assert 250 <= rows["response"]["p95_ms"] <= 500
+    assert rows["connect"]["count"] == 0
+
+
+def test_prometheus_export_is_a_cumulative_histogram():
+    recorder = MetricsRecorder()
+    for seconds in (0.003, 0.003, 42.0):
+        recorder.record(_lookup(seconds))
+
+    text = recorder.to_prometheus()
+    assert "# TYPE domain_checker_phase_seconds histogram" in text
+    assert 'domain_checker_phase_seconds_bucket{phase="response",le="0.005"} 2' in text
+    assert 'domain_checker_phase_seconds_bucket{phase="response",le="30"} 2' in text
+    assert 'domain_checker_phase_seconds_bucket{phase="response",le="+Inf"} 3' in text
+    assert 'domain_checker_phase_seconds_count{phase="total"} 3' in text
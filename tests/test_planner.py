@@ -0,0 +1,14 @@
+from domain_checker import plan_search
+
+
+def test_explicit_tld_survives_price_ceiling():
+    plan = plan_search({"words.json": ["abc", "abcd"]}, [".io", ".ir", ".site"],
+                       max_price=3_000_000, keep_tlds=[".io"])
+
+    assert {entry["tld"] for entry in plan} == {".io", ".ir", ".site"}
+
+
+def test_price_ceiling_prunes_other_tlds():
+    plan = plan_search({"words.json": ["abc"]}, [".io", ".ir"], max_price=3_000_000)
+
+    assert [entry["tld"] for entry in plan] == [".ir"]
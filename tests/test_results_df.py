@@ -0,0 +1,16 @@
+from app import build_results_df
+from jobs import CheckJob
+
+
+def test_tld_categories_do_not_depend_on_selection_order(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    frames = []
+    for tlds in ([".io", ".app", ".ai"], [".ai", ".io", ".app", ".io"]):
+        job = CheckJob(1, ["alpha"], tlds, "test")
+        for index, tld in enumerate(tlds):
+            job.add_record({"index": index, "word": "alpha", "tld": tld,
+                            "domain": f"alpha{tld}", "status": "Available"})
+        frames.append(build_results_df(job))
+
+    first, second = (list(frame["پسوند"].cat.categories) for frame in frames)
+    assert first == second == [".ai", ".app", ".io"]
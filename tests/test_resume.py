@@ -0,0 +1,90 @@
+import json
+import threading
+
+from domain_checker import ResultStore, WhoisCache, check_words
+from sharding import ShardCoordinator
+
+TRANSIENT = "Error: Transient (rate limited by WHOIS server)"
+
+
+def test_resume_skips_only_settled_results(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    store = ResultStore(path)
+    store.append({"domain": "a.io", "status": "Registered", "run_id": "r"})
+    store.append({"domain": "b.io", "status": TRANSIENT, "run_id": "r"})
+    store.close()
+
+    assert set(ResultStore(path).completed_in_run("r")) == {"a.io"}
+
+
+def test_coordinator_replaces_error_with_later_result(tmp_path):
+    store = ResultStore(str(tmp_path / "results.jsonl"))
+    coordinator = ShardCoordinator(["b"], [".io"], store, run_id="r")
+    lease = coordinator.lease("w1")
+
+    coordinator.report("w1", lease["shard"], [{"domain": "b.io", "status": TRANSIENT}])
+    coordinator.report("w1", lease["shard"], [{"domain": "b.io", "status": "Available"}],
+                       final=True)
+
+    assert coordinator.duplicates == 0
+    assert store.latest("b.io")["status"] == "Available"
+
+
+def test_resumed_run_rechecks_transient_errors_with_cache(tmp_path, monkeypatch):
+    import domain_checker
+
+    cache = WhoisCache(str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(domain_checker, "get_whois_cache", lambda: cache)
+
+    class _Scheduler:
+        def __init__(self):
+            self.lookups = []
+
+        def server_for(self, domain):
+            return "whois.test"
+
+        def lookup(self, domain):
+            self.lookups.append(domain)
+            if domain == "b.io" and self.lookups.count(domain) == 1:
+                return TRANSIENT, {}
+            return "Registered", {}
+
+    scheduler = _Scheduler()
+    path = str(tmp_path / "results.jsonl")
+    store = ResultStore(path)
+    # اجرای قطع‌شده: لغو پس از آخرین نتیجه، پس علامت پایان اجرا نوشته نمی‌شود
+    cancel = threading.Event()
+    first = {}
+    for record in check_words(["a", "b"], [".io"], max_workers=1, scheduler=scheduler,
+                              store=store, run_id="r", cancel_event=cancel):
+        first[record["domain"]] = record["status"]
+        if len(first) == 2:
+            cancel.set()
+    assert first["b.io"] == TRANSIENT
+    store.close()
+
+    resumed = list(check_words(["a", "b"], [".io"], max_workers=1, scheduler=scheduler,
+                               store=ResultStore(path), run_id="r"))
+
+    statuses = {record["domain"]: record for record in resumed}
+    assert statuses["a.io"].get("resumed")
+    assert statuses["b.io"]["status"] == "Registered"
+    assert sorted(scheduler.lookups) == ["a.io", "b.io", "b.io"]
+
+
+def test_unchanged_results_are_not_written_again(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    for run in range(3):
+        store = ResultStore(path)
+        store.append({"domain": "a.io", "status": "Registered", "run_id": "r"})
+        store.append({"domain": "b.io", "status": "Available" if run < 2 else "Registered",
+                      "run_id": "r"})
+        assert set(store.completed_in_run("r")) == {"a.io", "b.io"}
+        store.mark_run_complete("r")
+        store.close()
+
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if '"run_complete"' not in line]
+    assert [(record["domain"], record["status"]) for record in records] == [
+        ("a.io", "Registered"), ("b.io", "Available"), ("b.io", "Registered")]
+    assert ResultStore(path).latest("b.io")["status"] == "Registered"
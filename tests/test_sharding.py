@@ -0,0 +1,62 @@
+import urllib.error
+
+import pytest
+
+from domain_checker import ResultStore
+from sharding import CoordinatorServer, ShardCoordinator, _call, parse_args
+
+
+@pytest.fixture
+def coordinator(tmp_path):
+    coordinator = ShardCoordinator(["alpha"], [".io"], ResultStore(str(tmp_path / "r.jsonl")),
+                                   shard_size=1, lease_seconds=60.0, run_id="test")
+    yield coordinator
+    coordinator.store.close()
+
+
+def test_coordinator_listens_on_loopback_by_default():
+    assert parse_args(["coordinator"]).host == "127.0.0.1"
+
+
+def test_coordinator_rejects_requests_without_token(coordinator):
+    server = CoordinatorServer(coordinator, port=0, token="s3cret").start()
+    try:
+        assert server.server_address[0] == "127.0.0.1"
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            _call(server.url, "/lease", {"worker": "intruder"}, "wrong")
+        assert excinfo.value.code == 403
+        assert coordinator.status()["leased"] == 0
+
+        lease = _call(server.url, "/lease", {"worker": "w1"}, "s3cret")
+        assert lease["words"] == ["alpha"]
+    finally:
+        server.stop()
+
+
+def test_shard_with_errors_is_retried_by_another_worker(coordinator):
+    throttled = {"domain": "alpha.io", "status": "Error: Transient (rate limited by WHOIS server)"}
+    lease = coordinator.lease("w1")
+    coordinator.report("w1", lease["shard"], [throttled], final=True)
+
+    assert not coordinator.finished()
+    retry = coordinator.lease("w2")
+    assert retry["words"] == ["alpha"]
+    coordinator.report("w2", retry["shard"], [{"domain": "alpha.io", "status": "Available"}],
+                       final=True)
+
+    assert coordinator.finished()
+    assert coordinator.status()["requeues"] == 1
+    assert coordinator.store.latest("alpha.io")["status"] == "Available"
+
+
+def test_shard_is_closed_after_max_attempts(coordinator):
+    throttled = {"domain": "alpha.io", "status": "Error: Transient (rate limited by WHOIS server)"}
+    for attempt in range(coordinator.max_attempts):
+        lease = coordinator.lease(f"w{attempt}")
+        coordinator.report(f"w{attempt}", lease["shard"], [throttled], final=True)
+
+    assert coordinator.finished()
+    assert coordinator.lease("w9") == {"done": True}
+    # دامنه قطعی‌نشده مانده؛ اجرا بسته نمی‌شود تا اجرای بعدی آن را دوباره بررسی کند
+    with open(coordinator.store.path, encoding="utf-8") as f:
+        assert "run_complete" not in f.read()
@@ -0,0 +1,106 @@
+import http.client
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import whois_client
+from whois_client import TRANSIENT_ERROR_PREFIX, WhoisClient
+
+
+class _SlowOnceRdapHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests += 1
+        if self.server.requests == 1:
+            time.sleep(1.0)
+        body = b'{"errorCode": 404}'
+        self.send_response(404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _PlainHttpClient(WhoisClient):
+    """RDAP over plain HTTP to a local server, keeping the per-thread connection cache."""
+
+    def __init__(self, address, **kwargs):
+        super().__init__(**kwargs)
+        self.address = address
+
+    def rdap_base_for(self, tld):
+        return f"http://{self.address[0]}:{self.address[1]}/rdap/"
+
+    def _https_connection(self, host):
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        conn = connections.get(host)
+        if conn is None:
+            conn = connections[host] = http.client.HTTPConnection(
+                *self.address, timeout=self.timeout)
+        return conn
+
+
+@pytest.fixture
+def slow_once_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowOnceRdapHandler)
+    server.daemon_threads = True
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_rdap_timeout_discards_keep_alive_connection(slow_once_server):
+    client = _PlainHttpClient(slow_once_server.server_address, timeout=0.3)
+
+    status, _ = client.lookup("first.test")
+    assert status == f"{TRANSIENT_ERROR_PREFIX} (timed out)"
+
+    # اتصال قبلی نباید در وضعیت Request-sent گیر کرده باشد
+    assert client.lookup("second.test") == ("Available", {})
+    assert slow_once_server.requests == 2
+
+
+def test_unencodable_domain_is_a_general_error():
+    client = WhoisClient(use_rdap=False, connect_to=("127.0.0.1", 9))
+
+    status, fields = client.lookup("a" * 70 + ".io")
+    assert status.startswith("Error: General (")
+    assert fields == {}
+
+
+class _NoIanaClient(WhoisClient):
+    """IANA is unreachable; every other port-43 query answers "No match"."""
+
+    iana_attempts = 0
+
+    def _query_iana(self, tld):
+        self.iana_attempts += 1
+        raise ConnectionRefusedError("whois.iana.org unreachable")
+
+    def _whois_query(self, server, query, **kwargs):
+        self.server_used = server
+        return b"No match for " + query.encode("ascii")
+
+
+def test_iana_fallback_is_kept_until_retry_deadline(monkeypatch):
+    client = _NoIanaClient(use_rdap=False)
+
+    for word in ("alpha", "beta", "gamma"):
+        client.endpoint_for(f"{word}.zz")
+        assert client.lookup(f"{word}.zz") == ("Available", {})
+    assert client.iana_attempts == 1
+    assert client.server_used == "whois.nic.zz"
+
+    later = time.monotonic() + whois_client.IANA_RETRY_SECONDS + 1
+    monkeypatch.setattr(whois_client.time, "monotonic", lambda: later)
+    client.lookup("delta.zz")
+    assert client.iana_attempts == 2
@@ -0,0 +1,306 @@
+"""Minimal WHOIS (port 43) and RDAP client for yes/no availability checks.
+
+Unlike python-whois, nothing is parsed into a rich record: the registry reply is
+matched against "not found" / "registered" byte patterns and only the handful
+of fields the cache keeps are pulled out with regexes. The TLD -> server table
+is resolved once per process (seeded, then IANA), and RDAP lookups reuse one
+keep-alive HTTPS connection per host and thread. Port-43 WHOIS closes the
+connection after every answer, so there is nothing to pool there.
+"""
+import http.client
+import json
+import re
+import socket
+import ssl
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Tuple
+
+TRANSIENT_ERROR_PREFIX = "Error: Transient"
+WHOIS_PORT = 43
+IANA_WHOIS_SERVER = "whois.iana.org"
+RDAP_BOOTSTRAP_HOST = "data.iana.org"
+RDAP_BOOTSTRAP_PATH = "/rdap/dns.json"
+RDAP_BOOTSTRAP_RETRY_SECONDS = 300
+IANA_RETRY_SECONDS = 300
+DEFAULT_TIMEOUT = 10.0
+MAX_RESPONSE_BYTES = 256 * 1024
+
+# عبارت‌های «یافت نشد» رجیستری‌ها؛ روی بایت‌های خام (حروف کوچک) بررسی می‌شوند
+NOT_FOUND_PATTERNS = (
+    b"no match for", b"no match!!", b"not found", b"no entries found",
+    b"no data found", b"no object found", b"nothing found", b"no matching record",
+    b"the queried object does not exist", b"is available for", b"is free",
+    b"status: free", b"status: available", b"we do not have an entry",
+    b"domain not registered", b"no information available",
+)
+RATE_LIMIT_PATTERNS = (
+    b"rate limit", b"limit exceeded", b"too many", b"quota exceeded",
+    b"try again later", b"access denied",
+)
+# یک کلید ساختاریافته با مقدار غیرخالی یعنی رجیستری رکوردی برای دامنه برگردانده است
+REGISTERED_PATTERN = re.compile(
+    rb"^\s*(?:domain name|domain|registrar|creation date|created|registered on|nserver|"
+    rb"name server|registry expiry date)\s*:[ \t]*\S",
+    re.MULTILINE)
+FIELD_PATTERNS = {
+    "registrar": re.compile(r"^\s*(?:registrar|sponsoring registrar|registrar name)\s*:\s*(.+)$",
+                            re.IGNORECASE | re.MULTILINE),
+    "creation_date": re.compile(r"^\s*(?:creation date|created(?: on)?|registered on|registration time)\s*:\s*(.+)$",
+                                re.IGNORECASE | re.MULTILINE),
+    "expiration_date": re.compile(
+        r"^\s*(?:registry expiry date|registrar registration expiration date|expiration date|"
+        r"expiry date|expires(?: on)?|expire-date|paid-till|renewal date)\s*:\s*(.+)$",
+        re.IGNORECASE | re.MULTILINE),
+    "name_servers": re.compile(r"^\s*(?:name server|nserver|nameservers?)\s*:\s*(\S+)",
+                               re.IGNORECASE | re.MULTILINE),
+    "status": re.compile(r"^\s*(?:domain status|status)\s*:\s*(\S+)",
+                         re.IGNORECASE | re.MULTILINE),
+}
+
+
+def _no_phase(_phase: str) -> ContextManager[None]:
+    return nullcontext()
+
+
+def classify_whois_response(raw: bytes) -> str:
+    """Reduce a raw port-43 reply to Available, Registered or an error status."""
+    text = raw.lower()
+    if not text.strip():
+        return f"{TRANSIENT_ERROR_PREFIX} (Whois command returned no output)"
+    if REGISTERED_PATTERN.search(text):
+        return "Registered"
+    if any(pattern in text for pattern in NOT_FOUND_PATTERNS):
+        return "Available"
+    if any(pattern in text for pattern in RATE_LIMIT_PATTERNS):
+        return f"{TRANSIENT_ERROR_PREFIX} (rate limited by WHOIS server)"
+    return "Error: WHOIS Lookup (unrecognized response)"
+
+
+def extract_whois_fields(raw: bytes) -> Dict[str, Any]:
+    text = raw.decode("utf-8", "replace")
+    fields: Dict[str, Any] = {}
+    for field, pattern in FIELD_PATTERNS.items():
+        matches = [m.strip() for m in pattern.findall(text)]
+        if field in ("name_servers", "status"):
+            fields[field] = str(sorted({m.lower() for m in matches})) if matches else None
+        else:
+            fields[field] = matches[0] if matches else None
+    return fields
+
+
+def _rdap_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    events = {event.get("eventAction"): event.get("eventDate")
+              for event in data.get("events", [])}
+    registrar = None
+    for entity in data.get("entities", []):
+        if "registrar" in entity.get("roles", []):
+            for item in (entity.get("vcardArray") or [None, []])[1]:
+                if item and item[0] == "fn":
+                    registrar = item[3]
+    name_servers = sorted(ns.get("ldhName", "").lower()
+                          for ns in data.get("nameservers", []))
+    return {
+        "registrar": registrar,
+        "creation_date": events.get("registration"),
+        "expiration_date": events.get("expiration"),
+        "name_servers": str(name_servers) if name_servers else None,
+        "status": str(data.get("status")) if data.get("status") else None,
+    }
+
+
+class WhoisClient:
+    """Availability lookups over RDAP (when the registry offers it) or port-43 WHOIS.
+
+    ``connect_to`` sends every port-43 connection to one (host, port) pair,
+    which is how the benchmark points the client at its fake server.
+    ``phase`` is a context-manager factory used to time connect/response/parse.
+    """
+
+    def __init__(self, server_seeds: Optional[Dict[str, str]] = None,
+                 use_rdap: bool = True, timeout: float = DEFAULT_TIMEOUT,
+                 connect_to: Optional[Tuple[str, int]] = None,
+                 phase: Callable[[str], ContextManager[None]] = _no_phase):
+        self.timeout = timeout
+        self.use_rdap = use_rdap
+        self.connect_to = connect_to
+        self.phase = phase
+        self._servers: Dict[str, Optional[str]] = dict(server_seeds or {})
+        # پسوندهایی که سرورشان فقط حدس زده شده، با زمان تلاش دوباره از IANA
+        self._server_retry_at: Dict[str, float] = {}
+        self._rdap_bases: Optional[Dict[str, str]] = None
+        self._rdap_retry_at = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # --- جدول سرورها (یک بار برای هر پسوند) ---
+    def whois_server_for(self, tld: str) -> Optional[str]:
+        tld = tld.lower().lstrip(".")
+        key = "." + tld
+        with self._lock:
+            retry_at = self._server_retry_at.get(key)
+            if key in self._servers and (retry_at is None or time.monotonic() < retry_at):
+                return self._servers[key]
+        try:
+            server = self._query_iana(tld)
+        except OSError:
+            # سرور IANA در دسترس نیست؛ تا تلاش بعدی از حدس رایج استفاده کن
+            with self._lock:
+                self._servers[key] = f"whois.nic.{tld}"
+                self._server_retry_at[key] = time.monotonic() + IANA_RETRY_SECONDS
+                return self._servers[key]
+        with self._lock:
+            self._server_retry_at.pop(key, None)
+            self._servers[key] = server
+            return server
+
+    def _query_iana(self, tld: str) -> Optional[str]:
+        raw = self._whois_query(IANA_WHOIS_SERVER, tld,
+                                connect_phase="referral", response_phase="referral")
+        match = re.search(rb"^(?:whois|refer):\s*(\S+)", raw, re.MULTILINE | re.IGNORECASE)
+        return match.group(1).decode("ascii", "replace") if match else None
+
+    def rdap_base_for(self, tld: str) -> Optional[str]:
+        if not self.use_rdap:
+            return None
+        with self._lock:
+            bases = self._rdap_bases
+            retry = bases is None or (not bases and time.monotonic() >= self._rdap_retry_at)
+        if retry:
+            bases = self._load_rdap_bootstrap()
+            with self._lock:
+                self._rdap_bases = bases
+                if not bases:
+                    # تا تلاش بعدی فقط از WHOIS پورت ۴۳ استفاده کن
+                    self._rdap_retry_at = time.monotonic() + RDAP_BOOTSTRAP_RETRY_SECONDS
+        return bases.get(tld.lower().lstrip("."))
+
+    def _load_rdap_bootstrap(self) -> Dict[str, str]:
+        try:
+            status, body = self._https_get(RDAP_BOOTSTRAP_HOST, RDAP_BOOTSTRAP_PATH)
+            services = json.loads(body)["services"] if status == 200 else []
+        except (OSError, ValueError, KeyError, http.client.HTTPException):
+            services = []
+        bases: Dict[str, str] = {}
+        for tlds, urls in services:
+            https_urls = [url for url in urls if url.startswith("https://")]
+            for tld in tlds:
+                if https_urls:
+                    bases[tld.lower()] = https_urls[0]
+        return bases
+
+    def endpoint_for(self, domain: str) -> str:
+        """Name of the registry endpoint that will answer for ``domain`` (for rate limiting)."""
+        tld = domain.rsplit(".", 1)[-1]
+        rdap_base = self.rdap_base_for(tld)
+        if rdap_base is not None:
+            return "rdap:" + rdap_base.split("/")[2]
+        return self.whois_server_for(tld) or "whois:" + tld
+
+    # --- پرس‌وجو ---
+    def lookup(self, domain: str) -> Tuple[str, Dict[str, Any]]:
+        try:
+            domain = domain.encode("idna").decode("ascii").lower()
+        except UnicodeError as e:
+            # برچسب بیش از ۶۳ کاراکتر یا نویسه نامعتبر؛ مانند python-whois خطای عمومی
+            return f"Error: General ({e})", {}
+        tld = domain.rsplit(".", 1)[-1]
+        try:
+            rdap_base = self.rdap_base_for(tld)
+            if rdap_base is not None:
+                return self._lookup_rdap(rdap_base, domain)
+            server = self.whois_server_for(tld)
+            if server is None:
+                return f"Error: General (no whois server is known for .{tld})", {}
+            raw = self._whois_query(server, domain)
+        except socket.gaierror as e:
+            return f"Error: General ({e})", {}
+        except (OSError, http.client.HTTPException) as e:
+            message = str(e) or type(e).__name__
+            if isinstance(e, socket.timeout):
+                message = "timed out"
+            return f"{TRANSIENT_ERROR_PREFIX} ({message})", {}
+        with self.phase("parse"):
+            status = classify_whois_response(raw)
+            fields = extract_whois_fields(raw) if status == "Registered" else {}
+        return status, fields
+
+    def _connect(self, host: str, port: int, connect_phase: str) -> socket.socket:
+        address = self.connect_to or (host, port)
+        with self.phase(connect_phase):
+            return socket.create_connection(address, timeout=self.timeout)
+
+    def _whois_query(self, server: str, query: str,
+                     connect_phase: str = "connect", response_phase: str = "response") -> bytes:
+        sock = self._connect(server, WHOIS_PORT, connect_phase)
+        try:
+            with self.phase(response_phase):
+                sock.sendall(query.encode("utf-8") + b"\r\n")
+                chunks: List[bytes] = []
+                received = 0
+                while received < MAX_RESPONSE_BYTES:
+                    chunk = sock.recv(4096)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    received += len(chunk)
+        finally:
+            sock.close()
+        return b"".join(chunks)
+
+    def _https_connection(self, host: str) -> http.client.HTTPSConnection:
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        conn = connections.get(host)
+        if conn is None:
+            conn = http.client.HTTPSConnection(host, timeout=self.timeout,
+                                               context=ssl.create_default_context())
+            connections[host] = conn
+        return conn
+
+    def _https_get(self, host: str, path: str) -> Tuple[int, bytes]:
+        for attempt in range(2):
+            conn = self._https_connection(host)
+            try:
+                if conn.sock is None:
+                    with self.phase("connect"):
+                        conn.connect()
+                with self.phase("response"):
+                    conn.request("GET", path, headers={
+                        "Accept": "application/rdap+json, application/json",
+                        "Connection": "keep-alive"})
+                    response = conn.getresponse()
+                    body = response.read()
+                return response.status, body
+            except Exception as e:
+                # اتصال در وضعیت نامعلوم است (مثلاً پس از timeout)؛ همیشه کنار گذاشته شود
+                conn.close()
+                self._local.connections.pop(host, None)
+                disconnected = isinstance(e, (http.client.RemoteDisconnected, BrokenPipeError,
+                                              ConnectionResetError))
+                # اتصال keep-alive توسط سرور بسته شده؛ یک بار با اتصال تازه تلاش کن
+                if attempt or not disconnected:
+                    raise
+        raise http.client.HTTPException("unreachable")
+
+    def _lookup_rdap(self, base: str, domain: str) -> Tuple[str, Dict[str, Any]]:
+        host = base.split("/")[2]
+        path = "/" + base.split("/", 3)[3] if base.count("/") > 2 else "/"
+        if not path.endswith("/"):
+            path += "/"
+        status, body = self._https_get(host, f"{path}domain/{domain}")
+        if status == 404:
+            return "Available", {}
+        if status == 429:
+            return f"{TRANSIENT_ERROR_PREFIX} (RDAP rate limit exceeded)", {}
+        if status >= 500:
+            return f"{TRANSIENT_ERROR_PREFIX} (RDAP server error {status})", {}
+        if status != 200:
+            return f"Error: WHOIS Lookup (RDAP HTTP {status})", {}
+        with self.phase("parse"):
+            try:
+                return "Registered", _rdap_fields(json.loads(body))
+            except ValueError:
+                return "Registered", {}